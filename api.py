@@ -0,0 +1,204 @@
+import math
+
+import numpy as np
+
+from engine import REQUIRED_COLUMNS, compute_recommendations, rule_table
+from fluids import gas_z_factor
+from sizing import DROPLET_DEFAULTS, FORM_ALIASES, INPUTS, PARAMETERS, calculate_separator_batch
+from validation import ValidationError, validate_sizing, validate_upload
+
+# Units of the numbers returned by /api/size. dLeff_retention, the square root of the retention
+# d²·Leff (in²·ft) over 12, has no physical unit and is left unlabeled
+SIZE_UNITS = {
+    'diameter': 'in',
+    'height': 'in',
+    'length': 'ft',
+    'slenderness_ratio': '-',
+    'liquid_density': 'lb/ft3',
+    'gas_density': 'lb/ft3',
+    'settling_velocity': 'ft/s',
+    'Reynolds_number': '-',
+    'drag_coefficient': '-',
+    'Z': '-',
+    'dLeff_gas': 'in*ft',
+    'candidates.d': 'in',
+    'candidates.Leff': 'ft',
+    'candidates.Lss_liquid': 'ft',
+    'candidates.SR_liquid': '-',
+    'optimal.diameter': 'in',
+    'optimal.effective_length': 'ft',
+    'optimal.length': 'ft',
+    'optimal.slenderness_ratio': '-',
+    'optimal.volume': 'ft3',
+    'optimal.weight': 'lb',
+    'optimal.shell_thickness': 'in',
+}
+
+COMMON_OUTPUTS = ('diameter', 'liquid_density', 'gas_density', 'settling_velocity', 'Reynolds_number',
+                  'drag_coefficient')
+VERTICAL_OUTPUTS = COMMON_OUTPUTS + ('height', 'length', 'slenderness_ratio')
+HORIZONTAL_OUTPUTS = COMMON_OUTPUTS + ('dLeff_gas', 'dLeff_retention')
+CANDIDATE_OUTPUTS = ('d', 'Leff', 'Lss_liquid', 'SR_liquid')
+OPTIMAL_OUTPUTS = ('diameter', 'effective_length', 'length', 'slenderness_ratio', 'volume', 'weight',
+                   'shell_thickness')
+
+def _as_cases(payload, options=()):
+    # A single object, a list of objects or {"cases": [...]}; returns (cases, single). Request
+    # options may sit beside "cases" or in a single case object, and are not case fields
+    if isinstance(payload, dict) and isinstance(payload.get('cases'), list):
+        return payload['cases'], False
+    if isinstance(payload, dict):
+        return [{name: value for name, value in payload.items() if name not in options}], True
+    if isinstance(payload, list):
+        return payload, False
+    raise ValueError("Expected a JSON object, an array of objects or {\"cases\": [...]}.")
+
+
+def _raise_errors(errors):
+    # Cases are numbered from 0, by their index in the request
+    if errors:
+        raise ValidationError(errors, 'case')
+
+
+def _error(index, column, message):
+    return {'row': index, 'column': column, 'message': message}
+
+
+def _finite(values):
+    # Plain Python values with NaN/inf as None, since they are not valid JSON
+    return [None if isinstance(value, float) and not math.isfinite(value) else value for value in values]
+
+
+def parse_size_cases(cases):
+    """
+    Converts sizing cases to input arrays for calculate_separator_batch.
+
+    Each case names the /calc inputs (Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w,
+    B, separator_type; the form names P, T and M also work) and may override the droplet
+    sizes. Z may be left out to estimate it from Po, To and Sg. Every invalid case is
+    reported, not just the first, including out-of-range values (see
+    validation.validate_sizing).
+
+    Raises:
+        ValidationError: Listing the invalid cases by index.
+    """
+    columns = {name: np.empty(len(cases)) for name in PARAMETERS}
+    types = []
+    errors = []
+    for index, case in enumerate(cases):
+        if not isinstance(case, dict):
+            errors.append(_error(index, None, "expected an object"))
+            types.append('')
+            continue
+        case = {FORM_ALIASES.get(name, name): value for name, value in case.items()}
+        unknown = [name for name in case if name not in PARAMETERS and name != 'separator_type']
+        if unknown:
+            errors.append(_error(index, None, f"unknown fields {', '.join(unknown)}"))
+        for name in PARAMETERS:
+            value = case.get(name, DROPLET_DEFAULTS.get(name))
+            if value is None and name == 'Z':
+                columns[name][index] = np.nan
+                continue
+            if value is None:
+                errors.append(_error(index, name, f"{name} is required"))
+                continue
+            try:
+                columns[name][index] = float(value)
+            except (TypeError, ValueError):
+                errors.append(_error(index, name, f"{name} must be a number"))
+        separator_type = str(case.get('separator_type', '')).strip().capitalize()
+        if separator_type not in ('Vertical', 'Horizontal'):
+            errors.append(_error(index, 'separator_type', "separator_type must be Vertical or Horizontal"))
+        types.append(separator_type)
+    _raise_errors(errors)
+    estimate = np.isnan(columns['Z'])
+    if estimate.any():
+        columns['Z'][estimate] = gas_z_factor(columns['Po'][estimate], columns['To'][estimate], columns['Sg'][estimate])
+    _raise_errors(validate_sizing(columns, first_row=0))
+    return columns, np.array(types)
+
+
+def size_cases(payload, optimize=False):
+    """
+    Sizes one or many separators in a single vectorized pass.
+
+    Parameters:
+        payload: One case object, a list of cases or {"cases": [...]} (see parse_size_cases).
+            An "optimize" field of a single case object or beside "cases" is a request
+            option, read by the caller, not a case field.
+        optimize (bool): Add the minimum-volume design (see optimizer) to horizontal cases.
+
+    Returns:
+        object: One result dict for a single case, otherwise a list in input order. Results
+        carry the inputs' separator_type and the outputs relevant to it, in SIZE_UNITS.
+    """
+    cases, single = _as_cases(payload, options=('optimize',))
+    columns, types = parse_size_cases(cases)
+    if not len(types):
+        return []
+    sized = calculate_separator_batch(**columns, separator_type=types)
+    values = {key: _finite(sized[key].tolist()) for key in set(VERTICAL_OUTPUTS + HORIZONTAL_OUTPUTS)}
+    horizontal = types == 'Horizontal'
+    z_values = _finite(columns['Z'].tolist())
+
+    candidates = optimal = None
+    if horizontal.any():
+        rows = np.flatnonzero(horizontal)
+        candidates = {key: sized[key][rows] for key in CANDIDATE_OUTPUTS}
+        if optimize:
+            from optimizer import optimize_horizontal
+
+            design = optimize_horizontal(**{name: columns[name][rows] for name in INPUTS})
+            optimal = {key: _finite(design[key].tolist()) for key in OPTIMAL_OUTPUTS}
+            optimal['governing'] = design['governing'].tolist()
+            optimal['feasible'] = design['feasible'].tolist()
+
+    results = []
+    position = 0
+    for index, separator_type in enumerate(types.tolist()):
+        if separator_type == 'Vertical':
+            result = {key: values[key][index] for key in VERTICAL_OUTPUTS}
+        else:
+            result = {key: values[key][index] for key in HORIZONTAL_OUTPUTS}
+            result['candidates'] = [dict(zip(CANDIDATE_OUTPUTS, _finite(row)))
+                                    for row in zip(*(candidates[key][position].tolist() for key in CANDIDATE_OUTPUTS))]
+            if optimal is not None:
+                result['optimal'] = ({key: optimal[key][position] for key in OPTIMAL_OUTPUTS + ('governing',)}
+                                     if optimal['feasible'][position] else None)
+            position += 1
+        result['Z'] = z_values[index]
+        result['separator_type'] = separator_type
+        results.append(result)
+    return results[0] if single else results
+
+
+def recommend_cases(payload):
+    """
+    Separator recommendations for one or many cases given as JSON objects with the upload
+    column names (Gas Flow, Oil Flow, ..., Field Type).
+
+    Returns:
+        object: One recommendation dict for a single case, otherwise a list in input order.
+
+    Raises:
+        KeyError: If a required column is missing, like uploads.
+        ValueError: If the cases are malformed; ValidationError lists every invalid case
+            with the same checks as uploads.
+    """
+    import pandas as pd
+    from ingest import check_columns, normalize_columns
+
+    cases, single = _as_cases(payload)
+    _raise_errors([_error(index, None, "expected an object") for index, case in enumerate(cases)
+                   if not isinstance(case, dict)])
+    data = pd.DataFrame.from_records(cases)
+    data.columns = normalize_columns(data.columns)
+    check_columns(data.columns)
+    _raise_errors(validate_upload(data, first_row=0))
+    # Columns the rule table compares against text (Field Type) stay as given
+    for column in REQUIRED_COLUMNS:
+        if not rule_table.columns.get(column, False):
+            data[column] = pd.to_numeric(data[column])
+    results = [dict(zip(record, _finite(record.values()))) for record in compute_recommendations(data)]
+    return results[0] if single else results
+
@@ -1,23 +1,133 @@
-from flask import Flask, render_template, request, redirect, url_for
+import time
+
+# Start of the module import, for the startup gauge in /metrics (see benchmarks/startup.py)
+IMPORT_STARTED = time.perf_counter()
+
+from flask import (Flask, render_template, request, redirect, url_for, jsonify, Response, stream_with_context, abort,
+                   send_file, g)
 import os
-import pandas as pd
+import io
+import json
+import math
 from werkzeug.utils import secure_filename
-from fpdf import FPDF
-from math import sqrt, pi
 import tempfile
+import hashlib
+# pandas, openpyxl and fpdf are imported by the upload, export and PDF code paths when first
+# used, so serverless cold starts serving / or /calc do not pay for them
+from engine import REQUIRED_COLUMNS, rule_table
+import drag
+import fluids
+import optimizer
+import sizing
+from sizing import FORM_ALIASES, INPUTS, size_separator
+from fluids import gas_z_factor
+from optimizer import optimal_design
+from api import SIZE_UNITS, recommend_cases, size_cases
+from sweep import evaluate_sweep, grid_points, normalize_sweep, sweep_json, sweep_key, sweep_npz
+from cache import (SIZING_CACHE_VERSION, UPLOAD_CACHE_VERSION, SizingCache, UploadCache, file_digest, sizing_key,
+                   source_fingerprint)
+from results import ResultTable, as_result_table
+from store import ResultsExpired, create_result_store
+from jobs import JobQueue, describe_upload_error
+from metrics import RequestProfiler, registry as metrics, render_gauges, span, timed_iter
+from validation import ValidationError, validate_sizing
+
+# Form field names shown in /calc errors, for inputs named differently from the sizing parameters
+CALC_LABELS = {name: field for field, name in FORM_ALIASES.items()}
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = './uploads'
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Store results for download
-latest_results = []
+# Sizing results cache; set SIZING_CACHE_PATH to keep entries across worker restarts. Disk
+# entries are keyed by the sizing code as well, so a deploy never serves results of older code
+app.config['SIZING_CACHE_SIZE'] = int(os.environ.get('SIZING_CACHE_SIZE', 1024))
+app.config['SIZING_CACHE_TTL'] = float(os.environ.get('SIZING_CACHE_TTL', 3600))
+app.config['SIZING_CACHE_PATH'] = os.environ.get('SIZING_CACHE_PATH')
+sizing_cache = SizingCache(maxsize=app.config['SIZING_CACHE_SIZE'], ttl=app.config['SIZING_CACHE_TTL'],
+                           path=app.config['SIZING_CACHE_PATH'],
+                           version=f"{SIZING_CACHE_VERSION}-{source_fingerprint(sizing, drag, fluids, optimizer)}")
+
+# Rows per page of result.html; the full set is available from /results/<job_id>.ndjson
+app.config['RESULTS_PER_PAGE'] = 100
+app.config['RESULTS_MAX_PER_PAGE'] = 1000
+
+# Per-job result store; use sqlite:///path/to/results.db to share results between workers
+app.config['RESULT_STORE'] = os.environ.get('RESULT_STORE', 'memory')
+result_store = create_result_store(app.config['RESULT_STORE'])
+
+# Background processing for uploads posted with async=1. Progress of queued and running jobs is
+# only known to the worker that accepted them; other workers report a job once its results are
+# in a shared RESULT_STORE
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+# Jobs run process_upload, the pipeline of synchronous uploads (defined below)
+job_queue = JobQueue(result_store, max_workers=app.config['JOB_WORKERS'],
+                     process=lambda *args, **kwargs: process_upload(*args, **kwargs))
+
+# Rendered PDFs per job
+app.config['PDF_CACHE_SIZE'] = int(os.environ.get('PDF_CACHE_SIZE', 8))
+pdf_cache = SizingCache(maxsize=app.config['PDF_CACHE_SIZE'], ttl=app.config['SIZING_CACHE_TTL'])
+
+# Worker processes for process_file; 0 or 1 keeps processing in the request process
+app.config['PARALLEL_WORKERS'] = int(os.environ.get('PARALLEL_WORKERS', 0))
+
+# Upper bound on samples per Monte Carlo request
+app.config['MONTE_CARLO_MAX_SAMPLES'] = int(os.environ.get('MONTE_CARLO_MAX_SAMPLES', 10000000))
+
+# Encoded sweep results per grid definition and format
+app.config['SWEEP_CACHE_SIZE'] = int(os.environ.get('SWEEP_CACHE_SIZE', 16))
+app.config['SWEEP_MAX_POINTS'] = int(os.environ.get('SWEEP_MAX_POINTS', 5000000))
+sweep_cache = SizingCache(maxsize=app.config['SWEEP_CACHE_SIZE'], ttl=app.config['SIZING_CACHE_TTL'])
+
+# Upload recommendations and incremental revisions on local disk, keyed by file content, in
+# a directory private to this user; set UPLOAD_CACHE_DIR to an empty string to disable
+UPLOAD_CACHE_NAME = f"separator-upload-cache-{os.getuid()}" if hasattr(os, 'getuid') else 'separator-upload-cache'
+app.config['UPLOAD_CACHE_DIR'] = os.environ.get('UPLOAD_CACHE_DIR', os.path.join(tempfile.gettempdir(), UPLOAD_CACHE_NAME))
+app.config['UPLOAD_CACHE_BYTES'] = int(os.environ.get('UPLOAD_CACHE_BYTES', 512 * 1024 * 1024))
+app.config['UPLOAD_CACHE_ENTRIES'] = int(os.environ.get('UPLOAD_CACHE_ENTRIES', 256))
+upload_cache = None
+if app.config['UPLOAD_CACHE_DIR']:
+    try:
+        upload_cache = UploadCache(app.config['UPLOAD_CACHE_DIR'], max_bytes=app.config['UPLOAD_CACHE_BYTES'],
+                                   max_entries=app.config['UPLOAD_CACHE_ENTRIES'])
+    except PermissionError as e:
+        app.logger.warning("Upload cache disabled: %s", e)
+
+# Upper bound on cases per /api/size or /api/recommend call
+app.config['API_MAX_CASES'] = int(os.environ.get('API_MAX_CASES', 100000))
+
+# Set PROFILE_DIR to dump a cProfile file for every request
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR')
+profiler = RequestProfiler(app.config['PROFILE_DIR']) if app.config['PROFILE_DIR'] else None
+
+@app.before_request
+def start_request_timer():
+    if metrics.enabled:
+        g.request_start = time.perf_counter()
+    if profiler is not None:
+        g.profile = profiler.start()
+
+@app.after_request
+def record_request_time(response):
+    if profiler is not None and 'profile' in g:
+        profiler.stop(g.pop('profile'), request.endpoint)
+    if 'request_start' in g:
+        metrics.observe('separator_request_seconds', 'endpoint', request.endpoint or 'unknown',
+                        time.perf_counter() - g.pop('request_start'))
+    return response
 
 # Home Page
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def size_and_optimize(*inputs):
+    results = size_separator(*inputs)
+    # Horizontal results also carry the minimum-volume design next to the candidate table
+    if str(inputs[-1]).lower() == 'horizontal':
+        results['optimal'] = optimal_design(*inputs[:-1])
+    return results
+
 @app.route('/calc', methods=['GET', 'POST'])
 def calc():
     if request.method == 'POST':
@@ -31,7 +141,9 @@ def calc():
             Sg = float(request.form['Sg'])  # Specific gravity of gas
             SG_o = float(request.form['SG_o'])  # Specific gravity of Oil
             SG_w = float(request.form['SG_w'])  # Specific gravity of water
-            Z = float(request.form['Z'])  # Gas compressibility factor
+            # Gas compressibility factor; estimated from P, T and Sg when left blank
+            estimated_Z = not request.form.get('Z', '').strip()
+            Z = float(gas_z_factor(Po, To, Sg)) if estimated_Z else float(request.form['Z'])
             mu = float(request.form['M']) # mu
             # liquid_d_m = float(request.form['liquid_d_m']) # in micro
             # water_d_m = float(request.form['water_d_m'])# in micro
@@ -42,110 +154,104 @@ def calc():
             # retention_time = float(request.form['retention_time']) * 60  # Convert minutes to seconds
             separator_type = request.form['separator_type']  # Vertical or Horizontal
 
-            # Convert temperature to Rankine
-            T = To + 459.67
-
-            # Convert retention times to seconds
-            tr_o_sec = tr_o * 60
-            tr_w_sec = tr_w * 60
-
-            # Calculate liquid density (lb/ft³)
-            liquid_density_pl = 62.4 * (141.5 / (131.5 + SG_o))
-
-            # Calculate gas density (lb/ft³)
-            gas_density_pg = (2.7 * Sg * Po) / (T * Z)
-
-            # Initialize constants
-            Cd = 0.25
-            liquid_d_m = 100  # droplet diameter for liquid in microns
-            water_d_m = 500
-            oil_d_m = 200
-
-            # Settling velocity and drag coefficient iteration
-            for _ in range(5):
-                Vt = 0.0119 * ((liquid_density_pl - gas_density_pg) / gas_density_pg * liquid_d_m / Cd)
-                Re = 0.0049 * (gas_density_pg * liquid_d_m * Vt) / mu
-                Cd = 24 / Re + 3 / (Re ** 0.5) + 0.34
-
-            # Gravity difference for oil-water separation
-            dSG = SG_w - (141.5 / (131.5 + SG_o))
-
-            if separator_type.lower() == "vertical":
-                D_l = 5040 * (T * Z * Qg / Po) * ((gas_density_pg / (liquid_density_pl - gas_density_pg)) * (0.25 / liquid_d_m)) if 5040 * (T * Z * Qg / Po) * ((gas_density_pg / (liquid_density_pl - gas_density_pg)) * (0.25 / liquid_d_m)) > 0 else 0 ** 0.25
-                D_o = 6690 * (Qo * mu) / (dSG * (oil_d_m ** 2)) if 6690 * (Qo * mu) / (dSG * (oil_d_m ** 2)) > 0 else 0 ** 0.5
-                D_w = 6690 * (Qo * mu) / (dSG * (water_d_m ** 2)) if 6690 * (Qo * mu) / (dSG * (water_d_m ** 2)) > 0 else 0 ** 0.5
-                D = max(D_l, D_o, D_w)
-                H = (tr_o_sec * Qo + tr_w_sec * Qw) / (0.12 * D ** 2)  # Height for retention
-                if D <= 36:
-                    Lss = (H + 76) / 12
-                else:
-                    Lss = (H + D + 40) / 12
-                SR = (12 * Lss) / D  # Slenderness Ratio
-
-                results = {
-                    "diameter": round(D, 2),
-                    "height": round(H, 2),
-                    "length": round(Lss, 2),
-                    "slenderness_ratio": round(SR, 2),
-                    "liquid_density": round(liquid_density_pl, 2),
-                    "gas_density": round(gas_density_pg, 2),
-                    "settling_velocity": round(Vt, 2),
-                    "Reynolds_number": round(Re, 2),
-                    "drag_coefficient": round(Cd, 2)
-                }
-
-            elif separator_type.lower() == "horizontal":
-                H = (1.28 * (10 ** (-3)) * (tr_o_sec * dSG * (water_d_m ** 2))) / mu # Max oil pad thickness
-                AA = 0.5 * Qw * tr_w / (tr_o_sec * Qo + tr_w_sec * Qw)
-
-                D = H / B
-            
-                # Step 6: Calculate dLeff based on gas capacity constraint
-                dLeff = 420 * (T * Z * Qg / Po) * (((gas_density_pg / (liquid_density_pl - gas_density_pg)) * (Cd / liquid_d_m)) ** 0.5)
-
-                # Step 7: Calculate dLeff based on oil and water retention time constraints
-                d2Leff_retention = 1.42 * (Qw * tr_w_sec + Qo * tr_o_sec)
-
-                dLeff_retention = (d2Leff_retention ** 0.5) / 12
-
-                d = []
-                d.append(dLeff / 2)
-                Leff = []
-                Leff.append(d2Leff_retention / (d[0] / 2))
-                # Lss_gas = []
-                # Lss_gas.append(Leff[0] + d[0] / 12)
-                Lss_liquid = []
-                Lss_liquid.append(4/3 * Leff[0])
-                # SR_gas = []
-                SR_liquid = []
-                SR_liquid.append((12 * Lss_liquid[0])/d[0])
-
-
-                for i in range(1, 9):
-                    d.append(d[-1] + 15)
-                    Leff.append(d2Leff_retention / (d[i] / 2))
-                    # Lss_gas.append(Leff[i] + d[i] / 12)
-                    Lss_liquid.append(4/3 * Leff[i])
-
-                    SR_liquid.append((12 * Lss_liquid[i])/d[i])
-
-
-
-                results = {
-                    "diameter": round(D, 2),
-                    "dLeff_gas": round(dLeff, 2),
-                    "dLeff_retention": round(dLeff_retention, 2),
-                    "Lss_liquid": Lss_liquid,
-                    "d": d,
-                    "Leff": Leff,
-                    "SR_liquid": SR_liquid
-                }
-            return render_template('calc.html', results=results)
+            inputs = (Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, separator_type)
+            errors = validate_sizing(dict(zip(INPUTS, inputs[:-1])), labels=CALC_LABELS)
+            if estimated_Z:
+                # An estimate fails only through the inputs it came from; report those instead
+                errors = [error for error in errors if error['column'] != 'Z'] or errors
+            if errors:
+                return render_template('calc.html', errors=[error['message'] for error in errors]), 400
+            results = sizing_cache.get_or_compute(sizing_key(*inputs), lambda: size_and_optimize(*inputs))
+            if estimated_Z:
+                results = dict(results, estimated_Z=round(Z, 4))
+            with span('render'):
+                return render_template('calc.html', results=results)
 
         except ValueError:
-            return "Invalid input, please check your values."
+            return render_template('calc.html', errors=["Invalid input, please check your values."]), 400
     return render_template('calc.html')
 
+# Sizing cache counters for monitoring
+@app.route('/cache-stats')
+def cache_stats():
+    return jsonify(sizing_cache.stats())
+
+# P10/P50/P90 sizes for uncertain inputs, e.g.
+# {"separator_type": "Vertical", "samples": 100000, "seed": 1,
+#  "inputs": {"Qg": 5, "Z": {"dist": "normal", "mean": 0.9, "std": 0.03}, ...}}
+@app.route('/montecarlo', methods=['POST'])
+def montecarlo():
+    from montecarlo import run_monte_carlo
+
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict) or not isinstance(params.get('inputs'), dict):
+        return jsonify(error="Expected a JSON object with 'inputs' and 'separator_type'."), 400
+    try:
+        samples = int(params.get('samples', 100000))
+        if samples > app.config['MONTE_CARLO_MAX_SAMPLES']:
+            raise ValueError(f"At most {app.config['MONTE_CARLO_MAX_SAMPLES']} samples per request.")
+        seed = params.get('seed')
+        result = run_monte_carlo(params['inputs'], params.get('separator_type', ''), samples=samples,
+                                 seed=int(seed) if seed is not None else None,
+                                 workers=app.config['PARALLEL_WORKERS'],
+                                 percentiles=tuple(float(q) for q in params.get('percentiles', (10, 50, 90))),
+                                 optimize=bool(params.get('optimize', False)))
+    except (TypeError, ValueError) as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(result)
+
+# Sensitivity grid around an operating point, e.g.
+# {"separator_type": "Vertical", "inputs": {"Qg": 5, "P": 500, ...},
+#  "axes": [{"name": "P", "start": 200, "stop": 1500, "num": 100}, {"name": "T", "span": 0.2, "num": 50}]}
+# Returns flat C-order arrays as JSON (number lists, or base64 float32 with "encoding": "base64"),
+# or an .npz archive with ?format=npz
+@app.route('/sweep', methods=['POST'])
+def sweep():
+    params = request.get_json(silent=True)
+    if not isinstance(params, dict):
+        return jsonify(error="Expected a JSON object with 'inputs', 'axes' and 'separator_type'."), 400
+    fmt = request.args.get('format', params.get('format', 'json'))
+    encoding = params.get('encoding', 'list')
+    if fmt not in ('json', 'npz') or encoding not in ('list', 'base64'):
+        return jsonify(error="format must be json or npz and encoding list or base64"), 400
+    try:
+        definition = normalize_sweep(params.get('inputs'), params.get('axes'), params.get('separator_type', ''),
+                                     params.get('outputs'))
+    except (TypeError, ValueError) as e:
+        return jsonify(error=str(e)), 400
+    if grid_points(definition) > app.config['SWEEP_MAX_POINTS']:
+        return jsonify(error=f"At most {app.config['SWEEP_MAX_POINTS']} grid points per sweep."), 400
+
+    def compute():
+        with span('compute'):
+            result = evaluate_sweep(definition)
+        with span('export'):
+            return sweep_npz(result) if fmt == 'npz' else json.dumps(sweep_json(result, encoding))
+
+    payload = sweep_cache.get_or_compute((sweep_key(definition), fmt, encoding), compute)
+    if fmt == 'npz':
+        return send_file(io.BytesIO(payload), mimetype='application/octet-stream', as_attachment=True,
+                         download_name='sweep.npz')
+    return Response(payload, mimetype='application/json')
+
+# Rows matched per separator selection rule since startup
+@app.route('/rule-stats')
+def rule_stats():
+    return jsonify({'fingerprint': rule_table.fingerprint, 'hits': rule_table.hit_counts()})
+
+# Stage timings, request latencies and cache counters in Prometheus text format
+@app.route('/metrics')
+def metrics_endpoint():
+    body = metrics.render()
+    body += render_gauges('separator_sizing_cache', sizing_cache.stats(), "Sizing cache counter.")
+    body += render_gauges('separator_pdf_cache', pdf_cache.stats(), "PDF cache counter.")
+    if upload_cache is not None:
+        body += render_gauges('separator_upload_cache', upload_cache.stats(), "Upload cache counter.")
+    body += render_gauges('separator_rule_hits', rule_table.hit_counts(), "Rows matched by this separator rule.")
+    body += render_gauges('separator_startup', {'import_seconds': IMPORT_SECONDS},
+                          "Seconds spent importing the app module.")
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 # Handle File Upload and Processing
 @app.route('/upload', methods=['POST'])
 def upload_file():
@@ -156,217 +262,339 @@ def upload_file():
     if file.filename == '':
         return "No selected file!", 400
 
+    # Background mode: the worker owns the temporary directory and removes it when done
+    if request.values.get('async', '').lower() in ('1', 'true', 'yes'):
+        tmpdirname = tempfile.mkdtemp()
+        file_path = os.path.join(tmpdirname, secure_filename(file.filename))
+        file.save(file_path)
+        job_id = job_queue.submit(file_path, cleanup_dir=tmpdirname, incremental=incremental_args(file.filename))
+        return jsonify(job_id=job_id, status_url=url_for('job_status', job_id=job_id)), 202
+
     # Use a temporary directory for file uploads
     with tempfile.TemporaryDirectory() as tmpdirname:
         file_path = os.path.join(tmpdirname, secure_filename(file.filename))
         file.save(file_path)
 
         try:
-            result = process_file(file_path)
-            global latest_results
-            latest_results = result
-        except KeyError as e:
-            return f"Error: Missing expected column(s): {str(e)} in the file.", 400
-        except ValueError as e:
-            return f"Error: {str(e)}", 400
+            result, diff = process_upload(file_path, incremental_args(file.filename))
+            job_id = result_store.put(result)
         except Exception as e:
-            return f"Error processing file: {str(e)}", 400
-
-        return render_template('result.html', result=result)
+            return describe_upload_error(e), 400
+
+        return render_results(job_id, result, page=1, diff=diff)
+
+def paginate(results, page, per_page):
+    total = len(results)
+    pages = max(1, math.ceil(total / per_page))
+    page = min(max(page, 1), pages)
+    start = (page - 1) * per_page
+    return results[start:start + per_page], {
+        "page": page,
+        "pages": pages,
+        "per_page": per_page,
+        "total": total,
+    }
+
+def page_args():
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', app.config['RESULTS_PER_PAGE'], type=int)
+    return page, min(max(per_page, 1), app.config['RESULTS_MAX_PER_PAGE'])
+
+def render_results(job_id, results, page, per_page=None, diff=None):
+    rows, pagination = paginate(results, page, per_page or app.config['RESULTS_PER_PAGE'])
+    with span('render'):
+        return render_template('result.html', result=rows, pagination=pagination, job_id=job_id, diff=diff)
+
+def load_results(job_id):
+    results = result_store.get(job_id)
+    if results is None:
+        abort(404, description="Results not found; they may have expired. Please upload the file again.")
+    # Jobs stored by older code hold lists of dicts
+    return as_result_table(results) if isinstance(results, list) else results
+
+# A shared store can evict a job while a page or export is reading it; answer 410 rather
+# than a truncated download. Streamed responses (CSV, NDJSON) have already sent their
+# headers, so there the error aborts the transfer instead
+@app.errorhandler(ResultsExpired)
+def results_expired(e):
+    return "Results expired while they were being read. Please upload the file again.", 410
+
+def json_row(row):
+    # NaN/inf are not valid JSON; emit them as null
+    return {key: None if isinstance(value, float) and not math.isfinite(value) else value
+            for key, value in row.items()}
+
+# Paginated results view
+@app.route('/results/<job_id>')
+def results_page(job_id):
+    page, per_page = page_args()
+    return render_results(job_id, load_results(job_id), page, per_page)
+
+# One page of results as JSON
+@app.route('/results/<job_id>.json')
+def results_json(job_id):
+    page, per_page = page_args()
+    rows, pagination = paginate(load_results(job_id), page, per_page)
+    return jsonify(job_id=job_id, results=[json_row(row) for row in rows], **pagination)
+
+# All results as newline-delimited JSON, streamed row by row
+@app.route('/results/<job_id>.ndjson')
+def results_ndjson(job_id):
+    results = load_results(job_id)
+
+    def generate():
+        for row in results.iter_records():
+            yield json.dumps(json_row(row)) + "\n"
+
+    return Response(stream_with_context(timed_iter('export', generate())), mimetype='application/x-ndjson')
+
+def job_or_404(job_id):
+    job = job_queue.status(job_id)
+    if job is None:
+        # Started by another worker process: with a shared (SQLite) result store its results
+        # are visible here once it has finished
+        results = result_store.get(job_id)
+        if results is None:
+            abort(404, description="Unknown job.")
+        job = {"job_id": job_id, "state": "done", "rows_processed": len(results), "error": None, "details": None}
+    if job['state'] == 'done':
+        job['result_url'] = url_for('results_page', job_id=job_id)
+    return job
+
+# Background job status for polling
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    return jsonify(job_or_404(job_id))
+
+# Background job progress as server-sent events, until the job finishes
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    job_or_404(job_id)
+
+    def generate():
+        last = None
+        while True:
+            job = job_or_404(job_id)
+            if job != last:
+                yield f"data: {json.dumps(job)}\n\n"
+                last = job
+            if job['state'] in ('done', 'failed'):
+                break
+            time.sleep(0.5)
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'})
+
+# Background job results page once finished
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = job_or_404(job_id)
+    if job['state'] == 'done':
+        return redirect(job['result_url'])
+    if job['state'] == 'failed':
+        return job['error'], 400
+    return jsonify(job), 202
+
+def upload_key(file_path):
+    # Identical bytes reuse the results as long as the rules and code version are the same
+    extension = os.path.splitext(file_path)[1].lower().lstrip('.')
+    with span('parse'):
+        digest = file_digest(file_path)
+    return f"results-{extension}-{digest}-{rule_table.fingerprint[:16]}-v{UPLOAD_CACHE_VERSION}"
+
+def parse_file(file_path):
+    # Validated rows of an upload as one DataFrame, for the incremental diff
+    import pandas as pd
+    from ingest import iter_valid_chunks
+
+    chunks = list(iter_valid_chunks(file_path))
+    return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=REQUIRED_COLUMNS)
+
+# Process the uploaded file and return its recommendations as a ResultTable; only the
+# results are cached, so ingestion stays chunked
+def process_file(file_path, progress=None):
+    if upload_cache is None:
+        return compute_file(file_path, progress)
+
+    key = upload_key(file_path)
+    cached = upload_cache.get(key)
+    if cached is not None:
+        recommendations = ResultTable.from_arrays(cached)
+        if progress is not None:
+            progress(len(recommendations))
+        return recommendations
+    recommendations = compute_file(file_path, progress)
+    upload_cache.set(key, recommendations.to_arrays())
+    return recommendations
 
-# Process the uploaded file and return recommendations
-def process_file(file_path):
+# Single entry point for uploads, synchronous or background: (ResultTable, incremental diff or None)
+def process_upload(file_path, incremental=None, progress=None):
+    if incremental:
+        recommendations, diff = process_file_incremental(file_path, *incremental)
+        if progress is not None:
+            progress(len(recommendations))
+        return recommendations, diff
+    return process_file(file_path, progress), None
+
+# Recompute only the rows that changed since the last upload of the same case set
+def process_file_incremental(file_path, case_set, key_column=None):
+    from incremental import pack_revision, recompute_incremental, unpack_revision
+
+    data = parse_file(file_path)
+    revision_key = f"revision-{hashlib.sha256(case_set.encode()).hexdigest()}"
+    previous = upload_cache.get(revision_key) if upload_cache is not None else None
+    with span('compute'):
+        recommendations, revision, diff = recompute_incremental(
+            data, unpack_revision(previous) if previous is not None else None, key_column,
+            fingerprint=f"{rule_table.fingerprint}-v{UPLOAD_CACHE_VERSION}")
+    if upload_cache is not None:
+        upload_cache.set(revision_key, pack_revision(revision))
+    return recommendations, diff
+
+def incremental_args(filename):
+    # (case_set, key_column) for uploads posted with incremental=1, or None
+    if request.values.get('incremental', '').lower() not in ('1', 'true', 'yes'):
+        return None
+    case_set = request.values.get('case_set') or os.path.splitext(secure_filename(filename))[0]
+    return case_set, request.values.get('key_column') or None
+
+def is_parallel(file_path):
+    if app.config['PARALLEL_WORKERS'] <= 1:
+        return False
+    from parallel import PARALLEL_EXTENSIONS
+
+    return os.path.splitext(file_path)[1].lower() in PARALLEL_EXTENSIONS
+
+def compute_file(file_path, progress=None):
+    if is_parallel(file_path):
+        from parallel import process_file_parallel
+
+        # Worker processes keep their own metrics; time the whole run here
+        with span('compute'):
+            recommendations = process_file_parallel(file_path, workers=app.config['PARALLEL_WORKERS'])
+        if progress is not None:
+            progress(len(recommendations))
+        return recommendations
+
+    from ingest import iter_recommendation_chunks
+
+    # The whole upload is validated before any chunk is computed, so a bad row near the end
+    # costs no sizing work; each chunk is then evaluated column-wise
+    tables = []
+    rows = 0
+    for results in iter_recommendation_chunks(file_path, stream=False):
+        tables.append(results)
+        rows += len(results)
+        if progress is not None:
+            progress(rows)
+    return ResultTable.concat(tables)
+
+def api_cases():
+    # JSON body for the API routes; returns the payload or an error response
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return None, (jsonify(error="Expected a JSON body."), 400)
+    cases = payload.get('cases') if isinstance(payload, dict) else payload
+    if isinstance(cases, list) and len(cases) > app.config['API_MAX_CASES']:
+        return None, (jsonify(error=f"At most {app.config['API_MAX_CASES']} cases per request."), 413)
+    return payload, None
+
+# JSON sizing: one case object, an array of cases or {"cases": [...]}; "optimize": true in the
+# object (or ?optimize=1) adds the minimum-volume design to horizontal cases
+@app.route('/api/size', methods=['POST'])
+def api_size():
+    payload, error = api_cases()
+    if error:
+        return error
+    optimize = request.args.get('optimize', '').lower() in ('1', 'true', 'yes') or \
+        (isinstance(payload, dict) and payload.get('optimize') is True)
     try:
-        data = pd.read_excel(file_path)
-    except Exception as e:
-        raise Exception("Unable to read the file. Please ensure it is a valid Excel file.")
-
-    # Normalize column names to avoid issues
-    data.columns = [col.strip() for col in data.columns]
-
-    # Required columns
-    required_columns = ['Gas Flow', 'Oil Flow', 'Water Flow', 'Sand Content', 'Operating Pressure',
-                        'Operating Temperature', 'Oil API Gravity', 'Gas Specific Gravity', 'Field Type']
-    missing_columns = [col for col in required_columns if col not in data.columns]
-    if missing_columns:
-        raise KeyError(f"Missing columns: {', '.join(missing_columns)}")
-
-    # Calculate GOR (Gas-to-Oil Ratio) and Water Cut
-    data['GOR (scf/bbl)'] = data.apply(lambda row: row['Gas Flow'] / row['Oil Flow'] if row['Oil Flow'] != 0 else 0, axis=1)
-
-    data['Water Cut'] = data.apply(lambda row: row['Water Flow'] / (row['Oil Flow'] + row['Gas Flow'] + row['Water Flow']) if (row['Oil Flow'] + row['Gas Flow'] + row['Water Flow']) != 0 else 0, axis=1)
-
-    # Convert Gas Specific Gravity to Molar Mass
-    data['Molar Mass of Gas (kg/mol)'] = data['Gas Specific Gravity'] * 28.97 / 1000
-
-    # Define constants for calculations
-    API_CONVERSION = 141.5
-    GAS_CONSTANT = 8.314
-
-    # Function to calculate oil density
-    def api_to_density(api_gravity):
-        return API_CONVERSION / (api_gravity + 131.5)
-
-    # Function to calculate gas density
-    def gas_density(pressure, temperature, molar_mass):
-        return (pressure * molar_mass) / (GAS_CONSTANT * temperature)
-
-    # Perform calculations for each row
-    recommendations = []
-    for _, row in data.iterrows():
-        # Oil density
-        oil_density = api_to_density(row['Oil API Gravity'])
-
-        # Gas density
-        gas_density_value = gas_density(row['Operating Pressure'], row['Operating Temperature'], row['Molar Mass of Gas (kg/mol)'])
-
-        # Volumes
-        oil_volume = row['Oil Flow'] * 0.159
-        GOR_in_m3_m3 = row['GOR (scf/bbl)'] * 0.0283168 / 5.6146
-        gas_volume = oil_volume * GOR_in_m3_m3
-        total_volume = oil_volume + gas_volume
-        if row['Water Cut'] >= 1:
-            raise ValueError("Water Cut cannot be 100% or more.")
-        total_fluid_volume = total_volume / max(1 - row['Water Cut'], 0.0001)  # Prevent division by zero
-        # total_fluid_volume = total_volume / (1 - row['Water Cut'])
-
-        water_volume = total_fluid_volume * row['Water Cut']
-
-        # Fractions
-        oil_fraction = oil_volume / total_fluid_volume
-        gas_fraction = gas_volume / total_fluid_volume
-        water_fraction = water_volume / total_fluid_volume
-
-        # Separator logic
-        if row['Gas Flow'] > 15 or row['Water Flow'] > 8000:
-            separator_type = "Horizontal Separator"
-            reason = "Handles high gas and water flow efficiently due to a larger settling area."
-        elif row['Sand Content'] > 5:
-            separator_type = "Vertical Separator"
-            reason = "Recommended for high sand content to minimize clogging."
-        elif row['Gas Flow'] > 10 and row['Water Flow'] > 5000 and row['Sand Content'] < 5:
-            separator_type = "Horizontal Separator"
-            reason = "High gas, water, and sand content; suitable for managing multiphase flows."
-        elif row['Gas Specific Gravity'] > 0.8:
-            separator_type = "Horizontal Separator"
-            reason = "Better suited for gases with higher specific gravity, offering sufficient retention time."
-        elif row['Field Type'] == "Offshore" and row['Oil Flow'] > 1000:
-            separator_type = "Vertical Separator"
-            reason = "Compact design suitable for installations with high oil flow, where space is limited."
-        elif row['Oil API Gravity'] < 25 and row['Water Flow'] > 4000:
-            separator_type = "Horizontal Separator"
-            reason = "Heavy oil and significant water flow require efficient separation."
-        elif row['Gas Flow'] > 20 and row['Oil Flow'] < 500:
-            separator_type = "Horizontal Separator"
-            reason = "High gas-to-oil ratio; better suited for gas-dominant conditions."
-        elif row['Gas Flow'] < 5 and row['Water Flow'] < 3000:
-            separator_type = "Vertical Separator"
-            reason = "Suitable for low GOR."
-        elif row['Oil API Gravity'] > 40:
-            separator_type = "Vertical Separator"
-            reason = "Optimal for light oil with high API gravity."
-        else:
-            separator_type = "Vertical Separator"
-            reason = "Default choice for general conditions."
-
-
-        # separator_type, reason = determine_separator_type(row)
-
-        recommendations.append({
-            "Separator Type": separator_type,
-            "Reason": reason,
-            "Oil Flow (BOPD)": row['Oil Flow'],
-            "Water Flow (BWPD)": row['Water Flow'],
-            "Gas Flow (MMscfd)": row['Gas Flow'],
-            "Sand Content (%)": row['Sand Content'],
-            "Separated Oil (BOPD)": oil_volume * 1000,  # Adjusted for scaling
-            "Separated Water (BWPD)": water_volume * 1000,
-            "Separated Gas (MMscfd)": gas_volume * 35.315,  # Convert m^3 to MMscfd
-            "Flash Oil Fraction (%)": oil_fraction * 100,
-            "Flash Water Fraction (%)": water_fraction * 100,
-            "Flash Gas Fraction (%)": gas_fraction * 100
-        })
-
-    return recommendations
+        with span('compute'):
+            results = size_cases(payload, optimize=optimize)
+    except ValidationError as e:
+        return jsonify(error=str(e), errors=e.errors), 400
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(units=SIZE_UNITS, results=results)
+
+# JSON recommendations for cases with the upload columns, or for an uploaded file
+@app.route('/api/recommend', methods=['POST'])
+def api_recommend():
+    if 'file' in request.files:
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify(error="No selected file!"), 400
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            file_path = os.path.join(tmpdirname, secure_filename(file.filename))
+            file.save(file_path)
+            try:
+                result, diff = process_upload(file_path, incremental_args(file.filename))
+            except Exception as e:
+                return jsonify(error=describe_upload_error(e)), 400
+        job_id = result_store.put(result)
+        response = dict(job_id=job_id, count=len(result),
+                        results_url=url_for('results_json', job_id=job_id),
+                        ndjson_url=url_for('results_ndjson', job_id=job_id),
+                        csv_url=url_for('export_results', job_id=job_id, fmt='csv'))
+        if diff is not None:
+            response['diff'] = diff
+        return jsonify(response), 201
+
+    payload, error = api_cases()
+    if error:
+        return error
+    try:
+        with span('compute'):
+            results = recommend_cases(payload)
+    except ValidationError as e:
+        return jsonify(error=str(e), errors=e.errors), 400
+    except (KeyError, ValueError) as e:
+        return jsonify(error=describe_upload_error(e)), 400
+    return jsonify(results=results)
+
+# Export results for downstream tools
+@app.route('/results/<job_id>.<any(csv, xlsx, parquet):fmt>')
+def export_results(job_id, fmt):
+    from export import EXPORT_FORMATS, iter_csv, write_parquet, write_xlsx
+
+    results = load_results(job_id)
+    mimetype, download_name = EXPORT_FORMATS[fmt]
+    if fmt == 'csv':
+        return Response(stream_with_context(timed_iter('export', iter_csv(results))), mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={download_name}'})
+
+    # Binary formats are spooled to disk past 16 MB instead of held in memory
+    buffer = tempfile.SpooledTemporaryFile(max_size=16 * 1024 * 1024)
+    try:
+        with span('export'):
+            if fmt == 'xlsx':
+                write_xlsx(results, buffer)
+            else:
+                write_parquet(results, buffer)
+    except ValueError as e:
+        buffer.close()
+        return f"Error: {str(e)}", 501
+    except ResultsExpired:
+        buffer.close()
+        raise
+    buffer.seek(0)
+    return send_file(buffer, mimetype=mimetype, as_attachment=True, download_name=download_name)
+
+def render_pdf(results):
+    from report import build_results_pdf
+
+    with span('export'):
+        return build_results_pdf(results)
 
 # Generate and Download PDF
-@app.route('/download-pdf')
-def download_pdf():
-    from flask import send_file
-    class PDF(FPDF):
-        def __init__(self, orientation='L', unit='mm', format='A3'):
-            super().__init__(orientation, unit, format)
-
-        def header(self):
-            self.set_font('Arial', 'B', 12)
-            self.cell(0, 10, 'Separator Calculation Results', align='C', ln=True)
-            self.ln(10)
-
-        def footer(self):
-            self.set_y(-15)
-            self.set_font('Arial', 'I', 8)
-            self.cell(0, 10, f'Page {self.page_no()}', align='C')
-
-    pdf = PDF('L')  # 'L' for landscape orientation
-    pdf.add_page()
-    pdf.set_font('Arial', '', 8)
-
-    # Table header
-    headers = [
-        "Separator Type", "Reason", "Oil Flow (BOPD)", "Water Flow (BWPD)",
-        "Gas Flow (MMscfd)", "Sand Content (%)", "Separated Oil (BOPD)",
-        "Separated Water (BWPD)", "Separated Gas (MMscfd)",
-        "Flash Oil Fraction (%)", "Flash Water Fraction (%)", "Flash Gas Fraction (%)"
-    ]
-    
-    # Column width settings
-    col_width = 34  # Standard column width for most columns
-    row_height = 20  # Standard row height
-    reason_col_width = 34  # Wider width for the 'Reason' column
-
-    # Add table headers
-    for header in headers:
-        pdf.cell(col_width, row_height, header, border=1, align='C')
-    pdf.ln()
-
-    # Add rows for each result
-    for result in latest_results:
-        row = [
-            result['Separator Type'],
-            result['Reason'],  # This will be handled with multi_cell for text wrapping
-            str(result['Oil Flow (BOPD)']), str(result['Water Flow (BWPD)']),
-            str(result['Gas Flow (MMscfd)']), str(result['Sand Content (%)']),
-            str(result['Separated Oil (BOPD)']),
-            str(result['Separated Water (BWPD)']), str(result['Separated Gas (MMscfd)']),
-            f"{result['Flash Oil Fraction (%)']:.5f}",
-            f"{result['Flash Water Fraction (%)']:.5f}",
-            f"{result['Flash Gas Fraction (%)']:.5f}"
-        ]
-
-        # First column ("Separator Type")
-        pdf.cell(col_width, row_height, row[0], border=1, align='C')
-
-        # Save current X and Y for later use
-        x_before = pdf.get_x()
-        y_before = pdf.get_y()
-
-        # Reason column - Use multi_cell for wrapping text
-        pdf.multi_cell(reason_col_width, 5, row[1], border=1, align='C')
-
-        # Restore X and move Y to match the height of the tallest cell in this row
-        pdf.set_xy(x_before + reason_col_width, y_before)
-
-        # Add remaining cells
-        for i in range(2, len(row)):
-            pdf.cell(col_width, row_height, row[i], border=1, align='C')
-
-        pdf.ln() 
-
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_pdf:
-        pdf.output(temp_pdf.name)
-        temp_pdf.seek(0)
-        return send_file(temp_pdf.name, as_attachment=True, download_name="results.pdf")
+@app.route('/download-pdf/<job_id>')
+def download_pdf(job_id):
+    # A job's results never change, so its PDF is rendered once and served from memory afterwards
+    pdf_bytes = pdf_cache.get_or_compute((job_id,), lambda: render_pdf(load_results(job_id)))
+    return send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf', as_attachment=True,
+                     download_name="results.pdf")
+
+IMPORT_SECONDS = time.perf_counter() - IMPORT_STARTED
 
 if __name__ == "__main__":
     app.run(debug=True, port=5001)
@@ -0,0 +1,62 @@
+"""
+Scaling benchmark for parallel.process_file_parallel.
+
+Writes a synthetic case file, then times process_file's chunked single-core path against
+the process pool at increasing worker counts and prints a table:
+
+    python benchmarks/parallel_scaling.py --rows 1000000 --format csv
+    python benchmarks/parallel_scaling.py --rows 200000 --format xlsx --sheets 4
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synth import write_cases  # noqa: E402
+from ingest import iter_recommendation_chunks  # noqa: E402
+from parallel import process_file_parallel  # noqa: E402
+from results import ResultTable  # noqa: E402
+
+
+def write_benchmark_file(directory, rows, file_format, sheets):
+    return write_cases(os.path.join(directory, f"cases.{file_format}"), rows, sheets=sheets)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--format', choices=['csv', 'xlsx', 'parquet'], default='csv')
+    parser.add_argument('--sheets', type=int, default=1, help="Sheets to spread rows over (xlsx only)")
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_benchmark_file(directory, args.rows, args.format, args.sheets)
+        sheets = 'all' if args.format == 'xlsx' and args.sheets > 1 else None
+
+        if sheets is None:
+            baseline, expected = timed(lambda: ResultTable.concat(iter_recommendation_chunks(path)))
+        else:
+            baseline, expected = timed(process_file_parallel, path, workers=1, sheets=sheets)
+        print(f"{args.rows} rows, {args.format}, {os.cpu_count()} CPUs")
+        print(f"{'workers':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+        print(f"{'serial':>8} {baseline:9.2f} {args.rows / baseline:12.0f} {1:8.2f}")
+        for workers in args.workers:
+            elapsed, result = timed(process_file_parallel, path, workers=workers, sheets=sheets)
+            assert len(result) == len(expected), "parallel output does not match the serial run"
+            print(f"{workers:>8} {elapsed:9.2f} {args.rows / elapsed:12.0f} {baseline / elapsed:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
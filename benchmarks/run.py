@@ -0,0 +1,230 @@
+"""
+Benchmark suite for the sizing and upload pipelines.
+
+Suites:
+    sizing        a.calculate_separator per call and sizing.calculate_separator_batch per batch
+    calc          POST /calc through the Flask test client, sizing cache cleared
+    process_file  app.process_file on a synthetic case file, upload cache disabled
+    download_pdf  report.build_results_pdf on process_file output
+
+Each case reports throughput (rows/s), latency percentiles and peak traced memory (measured
+in a separate, untimed run because tracemalloc slows Python down). Results can be saved as
+JSON and compared against a run from another commit:
+
+    python benchmarks/run.py --sizes 1k 100k --output before.json
+    python benchmarks/run.py --sizes 1k 100k --compare before.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Every repeat must parse and compute; with the upload cache all but the first would be hits.
+# Set before app is imported, since app reads it at import time
+os.environ['UPLOAD_CACHE_DIR'] = ''
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synth import cached_cases, synthetic_sizing_inputs  # noqa: E402
+
+SIZES = {'1k': 1000, '10k': 10000, '100k': 100000, '1M': 1000000}
+SUITES = ('sizing', 'calc', 'process_file', 'download_pdf')
+
+# Per-call suites measure latency on at most this many calls
+MAX_CALLS = {'sizing': 5000, 'calc': 1000}
+
+# Excel generation and parsing at 1M rows takes minutes; larger sizes use CSV unless --format is given
+AUTO_EXCEL_MAX_ROWS = 100000
+
+
+def time_calls(func, calls):
+    """Runs func(i) for i in range(calls) and returns per-call latencies in seconds."""
+    latencies = np.empty(calls)
+    for i in range(calls):
+        start = time.perf_counter()
+        func(i)
+        latencies[i] = time.perf_counter() - start
+    return latencies
+
+
+def time_repeats(func, repeat):
+    return time_calls(lambda _: func(), repeat)
+
+
+def peak_memory(func):
+    """Peak memory traced by tracemalloc while func runs, in bytes."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def summarize(suite, case, rows, latencies, rows_per_call, memory):
+    return {
+        'suite': suite,
+        'case': case,
+        'rows': rows,
+        'samples': len(latencies),
+        'throughput_rows_per_s': rows_per_call * len(latencies) / latencies.sum(),
+        'mean_ms': latencies.mean() * 1000,
+        'p50_ms': np.percentile(latencies, 50) * 1000,
+        'p95_ms': np.percentile(latencies, 95) * 1000,
+        'p99_ms': np.percentile(latencies, 99) * 1000,
+        'peak_mb': memory / 1e6 if memory is not None else None,
+    }
+
+
+def bench_sizing(rows, args):
+    from a import calculate_separator
+    from sizing import calculate_separator_batch
+
+    inputs = synthetic_sizing_inputs(rows, seed=args.seed)
+    calls = min(rows, MAX_CALLS['sizing'])
+    cases = [{key: (value[i].item()) for key, value in inputs.items()} for i in range(calls)]
+
+    latencies = time_calls(lambda i: calculate_separator(**cases[i]), calls)
+    yield summarize('sizing', 'calculate_separator', calls, latencies, 1,
+                    peak_memory(lambda: calculate_separator(**cases[0])))
+
+    latencies = time_repeats(lambda: calculate_separator_batch(**inputs), args.repeat)
+    yield summarize('sizing', 'calculate_separator_batch', rows, latencies, rows,
+                    peak_memory(lambda: calculate_separator_batch(**inputs)))
+
+
+def bench_calc(rows, args):
+    import app
+
+    inputs = synthetic_sizing_inputs(rows, seed=args.seed)
+    calls = min(rows, MAX_CALLS['calc'])
+    form_names = {'Po': 'P', 'To': 'T', 'mu': 'M'}
+    forms = [{form_names.get(key, key): str(value[i]) for key, value in inputs.items()} for i in range(calls)]
+    client = app.app.test_client()
+    app.sizing_cache.clear()
+
+    latencies = time_calls(lambda i: client.post('/calc', data=forms[i]), calls)
+    app.sizing_cache.clear()
+    yield summarize('calc', 'POST /calc', calls, latencies, 1,
+                    peak_memory(lambda: client.post('/calc', data=forms[0])))
+
+
+def case_file(rows, args):
+    extension = args.format
+    if extension == 'auto':
+        extension = 'xlsx' if rows <= AUTO_EXCEL_MAX_ROWS else 'csv'
+    return cached_cases(args.data_dir, rows, '.' + extension, seed=args.seed)
+
+
+def bench_process_file(rows, args):
+    import app
+
+    path = case_file(rows, args)
+    latencies = time_repeats(lambda: app.process_file(path), args.repeat)
+    yield summarize('process_file', os.path.basename(path), rows, latencies, rows,
+                    peak_memory(lambda: app.process_file(path)))
+
+
+def bench_download_pdf(rows, args):
+    import app
+    from report import build_results_pdf
+
+    results = app.process_file(case_file(rows, args))
+    latencies = time_repeats(lambda: build_results_pdf(results), args.repeat)
+    yield summarize('download_pdf', 'build_results_pdf', rows, latencies, rows,
+                    peak_memory(lambda: build_results_pdf(results)))
+
+
+BENCHMARKS = {
+    'sizing': bench_sizing,
+    'calc': bench_calc,
+    'process_file': bench_process_file,
+    'download_pdf': bench_download_pdf,
+}
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    import pandas
+    return {
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pandas.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def print_table(records, baseline=None):
+    previous = {(r['suite'], r['case'], r['rows']): r for r in (baseline or [])}
+    header = f"{'suite':<13} {'case':<28} {'rows':>8} {'rows/s':>12} {'p50 ms':>10} {'p95 ms':>10} " \
+             f"{'p99 ms':>10} {'peak MB':>9}"
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header)
+    for r in records:
+        line = f"{r['suite']:<13} {r['case'][:28]:<28} {r['rows']:>8} {r['throughput_rows_per_s']:>12.0f} " \
+               f"{r['p50_ms']:>10.3f} {r['p95_ms']:>10.3f} {r['p99_ms']:>10.3f} {r['peak_mb'] or 0:>9.1f}"
+        if baseline is not None:
+            old = previous.get((r['suite'], r['case'], r['rows']))
+            line += f" {r['throughput_rows_per_s'] / old['throughput_rows_per_s']:>7.2f}x" if old else f" {'-':>8}"
+        print(line)
+
+
+def parse_size(value):
+    if value in SIZES:
+        return SIZES[value]
+    return int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['1k', '100k'], type=str,
+                        help="Row counts: 1k, 10k, 100k, 1M or an integer")
+    parser.add_argument('--suites', nargs='+', default=list(SUITES), choices=SUITES)
+    parser.add_argument('--repeat', type=int, default=5, help="Timed runs for whole-file and batch cases")
+    parser.add_argument('--format', default='auto', choices=['auto', 'xlsx', 'csv', 'parquet'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'separator-bench'),
+                        help="Where generated case files are cached between runs")
+    parser.add_argument('--output', help="Write results as JSON")
+    parser.add_argument('--compare', help="JSON from an earlier run to compare throughput against")
+    args = parser.parse_args()
+
+    records = []
+    for size in args.sizes:
+        rows = parse_size(size)
+        for suite in args.suites:
+            for record in BENCHMARKS[suite](rows, args):
+                records.append(record)
+                print(f"  {record['suite']} {record['case']} {rows}: {record['throughput_rows_per_s']:.0f} rows/s",
+                      file=sys.stderr)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+    print_table(records, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': environment(), 'results': records}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
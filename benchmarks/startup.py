@@ -0,0 +1,176 @@
+"""
+Cold-start benchmark for the serverless deployment.
+
+Every measurement runs in a fresh interpreter, like a new function instance. The script
+reports how long `import app` takes, which modules dominate it, and whether heavy
+dependencies (pandas, openpyxl, fpdf, pyarrow) were imported eagerly. It then reports the
+time to first response for each route: app import plus the first request, which includes
+any lazy imports the route triggers.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 5 --budget-ms 400 --output startup.json
+
+It exits with status 1 when the median import time exceeds the budget or a heavy module is
+loaded at import time, so it can gate deploys.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Median `import app` time allowed, in milliseconds
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', 500))
+
+# Modules that only the upload, export and PDF routes need
+HEAVY_MODULES = ('pandas', 'openpyxl', 'fpdf', 'pyarrow')
+
+CALC_FORM = {'Qg': '10', 'Qo': '2000', 'Qw': '500', 'P': '1000', 'T': '100', 'Sg': '0.7', 'SG_o': '35',
+             'SG_w': '1.05', 'Z': '0.85', 'M': '0.013', 'tr_o': '5', 'tr_w': '5', 'B': '0.5',
+             'separator_type': 'Horizontal'}
+
+ROUTES = ('GET /', 'GET /calc', 'POST /calc', 'GET /metrics', 'POST /upload', 'GET /download-pdf')
+
+# Rows in the file posted by the upload and PDF routes
+UPLOAD_ROWS = 100
+
+
+def child_env():
+    # Disable the upload cache so every run parses and computes
+    return dict(os.environ, UPLOAD_CACHE_DIR='', PYTHONPATH=ROOT)
+
+
+def run_child(args):
+    result = subprocess.run([sys.executable] + args, cwd=ROOT, env=child_env(), capture_output=True, text=True,
+                            check=True)
+    return result
+
+
+def measure_import():
+    """(milliseconds, [(module, cumulative ms)] for app's direct imports, eagerly loaded heavy modules)."""
+    code = ("import json, sys, time; start = time.perf_counter(); import app; "
+            "elapsed = time.perf_counter() - start; "
+            f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))")
+    result = run_child(['-X', 'importtime', '-c', code])
+    elapsed, heavy = json.loads(result.stdout)
+
+    # -X importtime lines: "import time: self [us] | cumulative | <indent>package"; two
+    # spaces of indent mark modules imported directly by app
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if name.startswith('   ') and not name.startswith('    '):
+            modules.append((name.strip(), int(cumulative) / 1000))
+    modules.sort(key=lambda item: -item[1])
+    return elapsed * 1000, modules, heavy
+
+
+def child_route(route, path):
+    # Runs in the child interpreter: times `import app` and the first request to `route`.
+    # The upload file is written by the parent so generating it imports nothing here.
+    start = time.perf_counter()
+    import app
+    imported = time.perf_counter()
+    client = app.app.test_client()
+
+    if route == 'GET /download-pdf':
+        # The upload is set-up, not part of the measured request
+        with open(path, 'rb') as f:
+            job_id = client.post('/api/recommend', data={'file': (f, 'cases.csv')}).get_json()['job_id']
+        request_start = time.perf_counter()
+        response = client.get(f'/download-pdf/{job_id}')
+    else:
+        request_start = time.perf_counter()
+        if route == 'GET /':
+            response = client.get('/')
+        elif route == 'GET /calc':
+            response = client.get('/calc')
+        elif route == 'POST /calc':
+            response = client.post('/calc', data=CALC_FORM)
+        elif route == 'GET /metrics':
+            response = client.get('/metrics')
+        else:
+            with open(path, 'rb') as f:
+                response = client.post('/upload', data={'file': (f, 'cases.csv')})
+    finished = time.perf_counter()
+
+    print(json.dumps({
+        'route': route,
+        'status': response.status_code,
+        'import_ms': (imported - start) * 1000,
+        'first_request_ms': (finished - request_start) * 1000,
+        'first_response_ms': (imported - start + finished - request_start) * 1000,
+        'heavy_modules': [m for m in HEAVY_MODULES if m in sys.modules],
+    }))
+
+
+def measure_route(route, path):
+    return json.loads(run_child([os.path.abspath(__file__), '--child', route, '--upload', path]).stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help="Fresh interpreters per measurement")
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS,
+                        help="Median import time allowed for `import app`")
+    parser.add_argument('--routes', nargs='+', default=list(ROUTES), choices=ROUTES)
+    parser.add_argument('--top', type=int, default=8, help="Slowest direct imports to list")
+    parser.add_argument('--output', help="Write results as JSON")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--upload', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child_route(args.child, args.upload)
+        return
+
+    imports = [measure_import() for _ in range(args.repeat)]
+    import_ms = statistics.median(elapsed for elapsed, _, _ in imports)
+    modules, heavy = imports[-1][1], sorted({m for _, _, loaded in imports for m in loaded})
+    print(f"import app: {import_ms:.0f} ms median of {args.repeat} (budget {args.budget_ms:.0f} ms)")
+    for name, ms in modules[:args.top]:
+        print(f"  {name:<24} {ms:8.1f} ms")
+    print(f"heavy modules at import: {', '.join(heavy) or 'none'}")
+
+    print(f"\n{'route':<20} {'status':>6} {'import ms':>10} {'request ms':>11} {'first resp ms':>14}  lazy imports")
+    from synth import write_cases
+
+    routes = []
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_cases(os.path.join(directory, 'cases.csv'), UPLOAD_ROWS)
+        for route in args.routes:
+            runs = [measure_route(route, path) for _ in range(args.repeat)]
+            record = {
+                'route': route,
+                'status': runs[-1]['status'],
+                'import_ms': statistics.median(run['import_ms'] for run in runs),
+                'first_request_ms': statistics.median(run['first_request_ms'] for run in runs),
+                'first_response_ms': statistics.median(run['first_response_ms'] for run in runs),
+                'heavy_modules': runs[-1]['heavy_modules'],
+            }
+            routes.append(record)
+            print(f"{route:<20} {record['status']:>6} {record['import_ms']:>10.0f} "
+                  f"{record['first_request_ms']:>11.0f} {record['first_response_ms']:>14.0f}  "
+                  f"{', '.join(record['heavy_modules']) or '-'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'import_ms': import_ms, 'budget_ms': args.budget_ms, 'imports': modules,
+                       'heavy_modules': heavy, 'routes': routes}, f, indent=2)
+
+    if import_ms > args.budget_ms or heavy:
+        print("\nstartup budget exceeded", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
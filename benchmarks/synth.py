@@ -0,0 +1,93 @@
+"""
+Synthetic case files for benchmarks, following the column schema of the sample workbooks in
+uploads/ (Oil_and_Gas_Flow_Data.xlsx, App.py.xlsx).
+
+Generation is seeded, so the same size always produces the same rows and timings stay
+comparable across commits.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+# (low, high) per numeric column, widened around the sample workbooks so every
+# separator selection rule is exercised
+COLUMN_RANGES = {
+    'Gas Flow': (0.5, 30.0),
+    'Oil Flow': (100.0, 10000.0),
+    'Water Flow': (0.0, 10000.0),
+    'Sand Content': (0.0, 14.0),
+    'Gas Specific Gravity': (0.55, 0.95),
+    'Oil API Gravity': (10.0, 50.0),
+    'Water Density': (1.0, 1.92),
+    'Oil Viscosity': (1.0, 17.0),
+    'Water Viscosity': (0.5, 1.7),
+    'Gas Droplet Size': (80.0, 140.0),
+    'Water Droplet Size in Oil': (50.0, 500.0),
+    'Oil Droplet Size in Water': (65.0, 200.0),
+    'Operating Pressure': (50.0, 1500.0),
+    'Operating Temperature': (60.0, 250.0),
+    'Retention Time for Oil': (3.0, 15.0),
+    'Retention Time for Water': (3.0, 20.0),
+    'Liquid Fill Percentage': (40.0, 60.0),
+}
+FIELD_TYPES = ['Onshore', 'Offshore']
+
+
+def synthetic_cases(rows, seed=0):
+    """Returns a DataFrame of `rows` random cases with the upload column schema."""
+    rng = np.random.default_rng(seed)
+    data = {column: rng.uniform(low, high, rows).round(3) for column, (low, high) in COLUMN_RANGES.items()}
+    data['Field Type'] = rng.choice(FIELD_TYPES, rows)
+    return pd.DataFrame(data)
+
+
+def synthetic_sizing_inputs(rows, seed=0):
+    """Random keyword arguments for a.calculate_separator / sizing.calculate_separator_batch, as arrays."""
+    rng = np.random.default_rng(seed)
+    return {
+        'Qg': rng.uniform(1, 50, rows),
+        'Qo': rng.uniform(100, 10000, rows),
+        'Qw': rng.uniform(100, 10000, rows),
+        'Po': rng.uniform(50, 2000, rows),
+        'To': rng.uniform(40, 200, rows),
+        'Sg': rng.uniform(0.55, 0.9, rows),
+        'SG_o': rng.uniform(15, 45, rows),
+        'SG_w': rng.uniform(1.0, 1.1, rows),
+        'Z': rng.uniform(0.7, 1.0, rows),
+        'mu': rng.uniform(0.01, 20, rows),
+        'tr_o': rng.uniform(1, 10, rows),
+        'tr_w': rng.uniform(1, 10, rows),
+        'B': rng.uniform(0.2, 1.0, rows),
+        'separator_type': rng.choice(['Vertical', 'Horizontal'], rows),
+    }
+
+
+def write_cases(path, rows, seed=0, sheets=1):
+    """
+    Writes synthetic cases to path; the format follows the extension (.xlsx, .csv, .parquet).
+    Excel rows are spread over `sheets` worksheets.
+    """
+    data = synthetic_cases(rows, seed)
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.csv':
+        data.to_csv(path, index=False)
+    elif extension == '.parquet':
+        data.to_parquet(path, row_group_size=100000)
+    else:
+        bounds = np.linspace(0, rows, sheets + 1).astype(int)
+        with pd.ExcelWriter(path) as writer:
+            for index in range(sheets):
+                part = data.iloc[bounds[index]:bounds[index + 1]]
+                part.to_excel(writer, sheet_name=f"Sheet{index + 1}", index=False)
+    return path
+
+
+def cached_cases(directory, rows, extension, seed=0):
+    """Path to a synthetic case file in directory, generating it on first use."""
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"cases_{rows}_{seed}{extension}")
+    if not os.path.exists(path):
+        write_cases(path + '.tmp' + extension, rows, seed)
+        os.replace(path + '.tmp' + extension, path)
+    return path
@@ -0,0 +1,317 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+
+def sizing_key(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, separator_type, digits=9):
+    """
+    Normalized cache key for a sizing request.
+
+    Floats are rounded to `digits` significant figures so values that only differ by form
+    round-off share an entry; the separator type is case-folded.
+    """
+    values = [float(f"{float(v):.{digits}g}") + 0.0 for v in (Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B)]
+    return tuple(values) + (str(separator_type).strip().lower(),)
+
+
+# Bump when cached sizing results change shape, so disk entries from older code are not served
+SIZING_CACHE_VERSION = 1
+
+
+def source_fingerprint(*modules):
+    """Short hash of the source files of modules, to tie cache entries to the code that computed them."""
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class SizingCache:
+    """
+    Thread-safe LRU cache with a time-to-live, optionally backed by a local SQLite file so
+    entries survive worker restarts and are shared between workers on the same host.
+
+    Parameters:
+        maxsize (int): Maximum number of in-memory entries; 0 disables the memory tier.
+        ttl (float): Seconds an entry stays valid; None keeps entries until evicted.
+        path (str): Optional SQLite file for the on-disk tier.
+        max_disk_entries (int): Row limit for the on-disk tier; oldest rows are dropped first.
+        version (str): Prefixed to on-disk keys, so entries written by other code versions
+            are never read back; defaults to SIZING_CACHE_VERSION.
+    """
+
+    def __init__(self, maxsize=1024, ttl=3600, path=None, max_disk_entries=100000, version=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self.version = str(version if version is not None else SIZING_CACHE_VERSION)
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path:
+            with self._connect() as db:
+                db.execute("CREATE TABLE IF NOT EXISTS sizing_cache "
+                           "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def _disk_key(self, key):
+        return json.dumps([self.version, key])
+
+    def _expired(self, created):
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key):
+        """Returns the cached value for key, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        if self.path:
+            with self._connect() as db:
+                row = db.execute("SELECT value, created FROM sizing_cache WHERE key = ?",
+                                 (self._disk_key(key),)).fetchone()
+            if row is not None and not self._expired(row[1]):
+                value = json.loads(row[0])
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._remember(key, value, row[1])
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, key, value):
+        created = time.time()
+        with self._lock:
+            self._remember(key, value, created)
+        if self.path:
+            with self._connect() as db:
+                db.execute("INSERT OR REPLACE INTO sizing_cache (key, value, created) VALUES (?, ?, ?)",
+                           (self._disk_key(key), json.dumps(value), created))
+                db.execute("DELETE FROM sizing_cache WHERE key IN (SELECT key FROM sizing_cache "
+                           "ORDER BY created DESC LIMIT -1 OFFSET ?)", (self.max_disk_entries,))
+
+    def _remember(self, key, value, created):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = (created, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Returns the cached value for key, calling compute() and storing its result on a miss."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.path:
+            with self._connect() as db:
+                db.execute("DELETE FROM sizing_cache")
+
+    def stats(self):
+        """Counters for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "path": self.path,
+                "version": self.version,
+            }
+
+
+# Bump when the recommendation results change shape, so upload cache entries from older code are not served
+UPLOAD_CACHE_VERSION = 3
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _check_private(directory):
+    # Another user who can write here could plant entries; refuse to use such a directory
+    if not hasattr(os, 'getuid'):
+        return
+    info = os.stat(directory)
+    if info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(f"Upload cache directory {directory} must be owned by this user and not "
+                              "writable by others.")
+
+
+class UploadCache:
+    """
+    Content-addressed cache of upload results on local disk, one .npz file per entry.
+
+    Keys are built from a hash of the uploaded bytes, so a file uploaded again under another
+    name hits the same entries. Entries are flat dicts of numpy arrays, loaded with
+    allow_pickle=False so a cache file can never run code. The directory is created private
+    (0700) and must stay owned by this user; entry files owned by anyone else are ignored.
+    Entries are dropped least recently used first once the directory holds more than
+    max_entries files or max_bytes bytes; writes go through a temporary file so concurrent
+    workers never read a partial entry.
+
+    Parameters:
+        directory (str): Cache directory, created if needed.
+        max_bytes (int): Size limit for all entries; larger single entries are not stored.
+        max_entries (int): Entry count limit.
+
+    Raises:
+        PermissionError: If the directory belongs to another user or others can write to it.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, max_entries=256):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        _check_private(directory)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            if hasattr(os, 'getuid') and os.fstat(f.fileno()).st_uid != os.getuid():
+                return None
+            with np.load(f, allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+
+    def get(self, key):
+        """Returns the cached dict of arrays for key, or None."""
+        path = self._path(key)
+        try:
+            value = self._read(path)
+            # The modification time orders entries for eviction
+            if value is not None:
+                os.utime(path)
+        except FileNotFoundError:
+            value = None
+        except Exception:
+            # Truncated or unreadable entry; drop it and recompute
+            self._remove(path)
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key, value):
+        """Stores value, a dict of numpy arrays without Python objects, under key."""
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **value)
+                size = f.tell()
+            if size > self.max_bytes:
+                self._remove(temp_path)
+                return
+            os.replace(temp_path, self._path(key))
+        except BaseException:
+            self._remove(temp_path)
+            raise
+        self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+    def _entries(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        count = len(entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes and count <= self.max_entries:
+                break
+            if self._remove(path):
+                with self._lock:
+                    self.evictions += 1
+            total -= size
+            count -= 1
+
+    def clear(self):
+        for _, _, path in self._entries():
+            self._remove(path)
+
+    def stats(self):
+        """Counters for monitoring."""
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "size": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "directory": self.directory,
+            }
@@ -0,0 +1,110 @@
+from typing import NamedTuple
+
+import numpy as np
+
+INITIAL_DRAG_COEFFICIENT = 0.25
+DRAG_ITERATIONS = 5
+DRAG_TOLERANCE = 1e-6
+DRAG_METHODS = ("fixed", "newton", "secant")
+
+
+class DragSolution(NamedTuple):
+    """Settling velocity, Reynolds number and drag coefficient plus solver stats, one entry per case."""
+    Vt: np.ndarray
+    Re: np.ndarray
+    Cd: np.ndarray
+    iterations: np.ndarray
+    residual: np.ndarray
+    converged: np.ndarray
+
+
+def settling_velocity(liquid_density_pl, gas_density_pg, droplet, Cd):
+    return 0.0119 * ((liquid_density_pl - gas_density_pg) / gas_density_pg * droplet / Cd)
+
+
+def reynolds_number(gas_density_pg, droplet, Vt, mu):
+    return 0.0049 * (gas_density_pg * droplet * Vt) / mu
+
+
+def drag_coefficient(Re):
+    return 24 / Re + 3 / (Re ** 0.5) + 0.34
+
+
+def solve_drag(liquid_density_pl, gas_density_pg, mu, droplet, tol=DRAG_TOLERANCE, max_iter=DRAG_ITERATIONS,
+               method="fixed", Cd0=INITIAL_DRAG_COEFFICIENT):
+    """
+    Solves Cd = drag_coefficient(Re(Vt(Cd))) element-wise, stopping each case as soon as it converges.
+
+    Parameters:
+        liquid_density_pl, gas_density_pg: Densities in lb/ft³ (scalars or arrays).
+        mu (float): Viscosity in cp.
+        droplet (float): Droplet diameter in microns.
+        tol (float): Relative step tolerance; 0 runs every case for max_iter steps.
+        max_iter (int): Maximum number of updates per case.
+        method (str): 'fixed' (the original Vt/Re/Cd substitution), 'newton' or 'secant'.
+        Cd0 (float): Starting drag coefficient.
+
+    Returns:
+        DragSolution: Vt and Re are evaluated at the last Cd fed into the update, as in the
+        original loop. residual is |Cd - drag_coefficient(Re(Cd))| at the returned Cd; cases
+        that diverge or end on a non-finite residual are not converged.
+    """
+    if method not in DRAG_METHODS:
+        raise ValueError(f"Unknown drag solver method: {method}")
+
+    arrays = np.broadcast_arrays(*[np.atleast_1d(np.asarray(v, dtype=float))
+                                   for v in (liquid_density_pl, gas_density_pg, mu, droplet)])
+    shape = arrays[0].shape
+    pl, pg, visc, dm = [a.ravel() for a in arrays]
+    n = pl.size
+
+    # Re = k / Cd, so Cd_next = 24 Cd / k + 3 (Cd / k) ** 0.5 + 0.34
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        k = 0.0049 * 0.0119 * (pl - pg) * dm ** 2 / visc
+
+        Cd = np.full(n, Cd0, dtype=float)
+        Vt = np.full(n, np.nan)
+        Re = np.full(n, np.nan)
+        iterations = np.zeros(n, dtype=int)
+        converged = np.zeros(n, dtype=bool)
+        previous_Cd = np.full(n, np.nan)
+        previous_f = np.full(n, np.nan)
+
+        active = np.arange(n)
+        for step in range(max_iter):
+            if active.size == 0:
+                break
+            c = Cd[active]
+            vt = settling_velocity(pl[active], pg[active], dm[active], c)
+            re = reynolds_number(pg[active], dm[active], vt, visc[active])
+            g = drag_coefficient(re)
+
+            if method == "fixed" or (method == "secant" and step == 0):
+                new = g
+            elif method == "newton":
+                slope = 24 / k[active] + 1.5 / np.sqrt(c * k[active]) - 1
+                new = c - (g - c) / slope
+            else:
+                f = g - c
+                slope = (f - previous_f[active]) / (c - previous_Cd[active])
+                new = np.where(slope != 0, c - f / slope, g)
+
+            if method == "secant":
+                previous_Cd[active] = c
+                previous_f[active] = g - c
+
+            Vt[active] = vt
+            Re[active] = re
+            Cd[active] = new
+            iterations[active] += 1
+
+            # inf <= inf holds, so a diverging step must not count as converged
+            done = (np.abs(new - c) <= tol * np.abs(new)) & np.isfinite(new)
+            converged[active[done]] = True
+            active = active[~done & np.isfinite(new)]
+
+        residual = np.abs(drag_coefficient(k / Cd) - Cd)
+        # Cases without a fixed point end on NaN; they are not converged either
+        converged &= np.isfinite(residual)
+
+    return DragSolution(*(a.reshape(shape) for a in (Vt, Re, Cd, iterations, residual, converged)))
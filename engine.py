@@ -0,0 +1,83 @@
+import os
+
+import numpy as np
+
+from results import ResultTable
+from rules import DEFAULT_RULES_PATH, load_rule_table
+
+# Separator selection rules; point SEPARATOR_RULES at a JSON or YAML table to tune thresholds per field
+rule_table = load_rule_table(os.environ.get('SEPARATOR_RULES', DEFAULT_RULES_PATH))
+
+# Required columns, plus any extra column the rule table compares against
+REQUIRED_COLUMNS = ['Gas Flow', 'Oil Flow', 'Water Flow', 'Sand Content', 'Operating Pressure',
+                    'Operating Temperature', 'Oil API Gravity', 'Gas Specific Gravity', 'Field Type']
+REQUIRED_COLUMNS += [column for column in rule_table.columns if column not in REQUIRED_COLUMNS]
+
+
+def _as_float(data, column):
+    return data[column].to_numpy(dtype=float, na_value=np.nan)
+
+
+def compute_result_table(data, rules=None, hits=None):
+    """
+    Computes derived columns and separator recommendations as whole-array operations.
+
+    Parameters:
+        data (DataFrame): Input rows with normalized column names.
+        rules (RuleTable): Rule table for the separator choice; defaults to the configured table.
+        hits (ndarray): Counters from rules.new_hits to add rule hits to, instead of
+            recording them in the table right away.
+
+    Returns:
+        ResultTable: One row per input row, in input order.
+    """
+    gas_flow = _as_float(data, 'Gas Flow')
+    oil_flow = _as_float(data, 'Oil Flow')
+    water_flow = _as_float(data, 'Water Flow')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Calculate GOR (Gas-to-Oil Ratio) and Water Cut
+        gor = np.where(oil_flow != 0, gas_flow / oil_flow, 0.0)
+        total_flow = oil_flow + gas_flow + water_flow
+        water_cut = np.where(total_flow != 0, water_flow / total_flow, 0.0)
+
+        if np.any(water_cut >= 1):
+            raise ValueError("Water Cut cannot be 100% or more.")
+
+        # Volumes
+        oil_volume = oil_flow * 0.159
+        gor_in_m3_m3 = gor * 0.0283168 / 5.6146
+        gas_volume = oil_volume * gor_in_m3_m3
+        total_volume = oil_volume + gas_volume
+        total_fluid_volume = total_volume / np.maximum(1 - water_cut, 0.0001)  # Prevent division by zero
+        water_volume = total_fluid_volume * water_cut
+
+        # Fractions
+        oil_fraction = oil_volume / total_fluid_volume
+        gas_fraction = gas_volume / total_fluid_volume
+        water_fraction = water_volume / total_fluid_volume
+
+    # Types and reasons are kept as the index of the matched rule into the table's labels
+    rules = rules or rule_table
+    index = rules.match(data, hits)
+
+    columns = {
+        "Oil Flow (BOPD)": data['Oil Flow'].to_numpy(),
+        "Water Flow (BWPD)": data['Water Flow'].to_numpy(),
+        "Gas Flow (MMscfd)": data['Gas Flow'].to_numpy(),
+        "Sand Content (%)": data['Sand Content'].to_numpy(),
+        "Separated Oil (BOPD)": oil_volume * 1000,  # Adjusted for scaling
+        "Separated Water (BWPD)": water_volume * 1000,
+        "Separated Gas (MMscfd)": gas_volume * 35.315,  # Convert m^3 to MMscfd
+        "Flash Oil Fraction (%)": oil_fraction * 100,
+        "Flash Water Fraction (%)": water_fraction * 100,
+        "Flash Gas Fraction (%)": gas_fraction * 100
+    }
+    return ResultTable.from_codes(columns, {"Separator Type": (rules.types, index), "Reason": (rules.reasons, index)})
+
+
+def compute_recommendations(data, rules=None):
+    """
+    Recommendations as dicts, one per input row in input order (see compute_result_table).
+    """
+    return compute_result_table(data, rules).to_records()
@@ -0,0 +1,69 @@
+import csv
+import io
+
+from results import CATEGORY_COLUMNS, RESULT_COLUMNS, iter_result_batches
+
+HEADERS = list(RESULT_COLUMNS)
+
+# Rows buffered per CSV chunk / Parquet record batch
+EXPORT_BATCH_ROWS = 10000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'results.csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'results.xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'results.parquet'),
+}
+
+
+def iter_csv(results, batch_rows=EXPORT_BATCH_ROWS):
+    """Yields the results as CSV text, one chunk per batch_rows rows, header first."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(HEADERS)
+    for batch in iter_result_batches(results, batch_rows):
+        writer.writerows(zip(*batch.to_lists(HEADERS)))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_xlsx(results, fileobj, batch_rows=EXPORT_BATCH_ROWS):
+    """Writes the results to fileobj as a single-sheet workbook using openpyxl's write-only mode."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet("Results")
+    worksheet.append(HEADERS)
+    for batch in iter_result_batches(results, batch_rows):
+        for row in zip(*batch.to_lists(HEADERS)):
+            worksheet.append(row)
+    workbook.save(fileobj)
+
+
+def write_parquet(results, fileobj, batch_rows=EXPORT_BATCH_ROWS):
+    """
+    Writes the results to fileobj as Parquet, one row group per batch_rows rows.
+
+    Numeric columns are handed to pyarrow as the table's arrays and text columns are
+    expanded from their category codes, so no per-row Python objects are created.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export requires the pyarrow package.")
+
+    schema = pa.schema([(header, pa.string() if header in CATEGORY_COLUMNS else pa.float64())
+                        for header in HEADERS])
+    with pq.ParquetWriter(fileobj, schema) as writer:
+        for batch in iter_result_batches(results, batch_rows):
+            arrays = []
+            for field in schema:
+                if field.name in batch.codes:
+                    labels = pa.array(batch.categories[field.name], type=pa.string())
+                    arrays.append(labels.take(pa.array(batch.codes[field.name])))
+                else:
+                    arrays.append(pa.array(batch.columns[field.name], type=field.type, from_pandas=True))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
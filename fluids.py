@@ -0,0 +1,169 @@
+from functools import lru_cache
+
+import numpy as np
+
+RANKINE_OFFSET = 459.67
+AIR_MOLECULAR_WEIGHT = 28.97
+GAS_CONSTANT = 10.732  # psia·ft³/(lb-mol·°R)
+WATER_DENSITY = 62.368  # lb/ft³ at standard conditions
+
+# Dranchuk-Abou-Kassem fit of the Standing-Katz chart
+DAK = (0.3265, -1.0700, -0.5339, 0.01569, -0.05165, 0.5475, -0.7361, 0.1844, 0.1056, 0.6134, 0.7210)
+DAK_ITERATIONS = 50
+DAK_TOLERANCE = 1e-12
+
+# Pseudo-reduced grid of the Z-factor table; points outside it are solved directly
+TABLE_TPR = (1.05, 3.0, 391)
+TABLE_PPR = (0.0, 30.0, 1201)
+
+
+def pseudo_critical(Sg):
+    """Sutton pseudo-critical pressure (psia) and temperature (°R) of a natural gas of specific gravity Sg."""
+    Sg = np.asarray(Sg, dtype=float)
+    Ppc = 756.8 - 131.07 * Sg - 3.6 * Sg ** 2
+    Tpc = 169.2 + 349.5 * Sg - 74.0 * Sg ** 2
+    return Ppc, Tpc
+
+
+def dak_z_factor(Ppr, Tpr, tol=DAK_TOLERANCE, max_iter=DAK_ITERATIONS):
+    """
+    Z-factor from the Dranchuk-Abou-Kassem equation of state, solved element-wise for the
+    reduced density with Newton's method (valid for 1.0 < Tpr <= 3.0 and Ppr < 30).
+
+    Parameters:
+        Ppr, Tpr: Pseudo-reduced pressure and temperature, scalars or arrays.
+        tol (float): Step tolerance on the reduced density.
+        max_iter (int): Maximum Newton steps; cases that have not converged are NaN.
+    """
+    Ppr, Tpr = np.broadcast_arrays(np.asarray(Ppr, dtype=float), np.asarray(Tpr, dtype=float))
+    shape = Ppr.shape
+    Ppr, Tpr = Ppr.ravel(), Tpr.ravel()
+    A1, A2, A3, A4, A5, A6, A7, A8, A9, A10, A11 = DAK
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        C1 = A1 + A2 / Tpr + A3 / Tpr ** 3 + A4 / Tpr ** 4 + A5 / Tpr ** 5
+        C2 = A6 + A7 / Tpr + A8 / Tpr ** 2
+        C3 = A9 * (A7 / Tpr + A8 / Tpr ** 2)
+        C4 = A10 / Tpr ** 3
+        target = 0.27 * Ppr / Tpr
+
+        def z(rho, c1, c2, c3, c4):
+            return 1 + c1 * rho + c2 * rho ** 2 - c3 * rho ** 5 + c4 * (1 + A11 * rho ** 2) * rho ** 2 * np.exp(-A11 * rho ** 2)
+
+        # F(rho) = rho * Z(rho) - 0.27 Ppr / Tpr, starting from the ideal gas; each step only
+        # updates the cases that have not converged yet
+        rho = target.copy()
+        converged = target == 0
+        active = np.flatnonzero(~converged)
+        for _ in range(max_iter):
+            if not active.size:
+                break
+            r, c1, c2, c3, c4 = rho[active], C1[active], C2[active], C3[active], C4[active]
+            F = r * z(r, c1, c2, c3, c4) - target[active]
+            dF = (1 + 2 * c1 * r + 3 * c2 * r ** 2 - 6 * c3 * r ** 5
+                  + c4 * np.exp(-A11 * r ** 2) * (3 * r ** 2 + A11 * (3 * r ** 4 - 2 * A11 * r ** 6)))
+            step = F / dF
+            r = np.where(r - step > 0, r - step, r / 2)
+            rho[active] = r
+            done = np.abs(step) <= tol * np.maximum(r, 1.0)
+            converged[active[done]] = True
+            active = active[~done]
+        return np.where(converged, z(rho, C1, C2, C3, C4), np.nan).reshape(shape)
+
+
+@lru_cache(maxsize=1)
+def z_table():
+    """(Tpr axis, Ppr axis, Z grid) of DAK Z-factors, built on first use."""
+    Tpr = np.linspace(*TABLE_TPR)
+    Ppr = np.linspace(*TABLE_PPR)
+    return Tpr, Ppr, dak_z_factor(Ppr[np.newaxis, :], Tpr[:, np.newaxis])
+
+
+def z_factor(Ppr, Tpr, method="table"):
+    """
+    Z-factor at pseudo-reduced conditions.
+
+    method "table" interpolates bilinearly in the precomputed DAK grid (z_table), so large
+    batches need no root solving; points outside the grid fall back to dak_z_factor, which
+    method "dak" uses for every point.
+    """
+    Ppr, Tpr = np.broadcast_arrays(np.asarray(Ppr, dtype=float), np.asarray(Tpr, dtype=float))
+    if method == "dak":
+        return dak_z_factor(Ppr, Tpr)
+    if method != "table":
+        raise ValueError("method must be table or dak")
+
+    t, p, grid = z_table()
+    dt, dp = t[1] - t[0], p[1] - p[0]
+    inside = (Tpr >= t[0]) & (Tpr <= t[-1]) & (Ppr >= p[0]) & (Ppr <= p[-1])
+    with np.errstate(invalid='ignore'):
+        x = np.clip((Tpr - t[0]) / dt, 0, len(t) - 1)
+        y = np.clip((Ppr - p[0]) / dp, 0, len(p) - 1)
+    i = np.minimum(np.nan_to_num(x).astype(np.intp), len(t) - 2)
+    j = np.minimum(np.nan_to_num(y).astype(np.intp), len(p) - 2)
+    fx, fy = x - i, y - j
+    # Corner values through flat indices, which gather faster than 2-D fancy indexing
+    flat = grid.ravel()
+    k = i * len(p) + j
+    Z = ((1 - fx) * ((1 - fy) * flat[k] + fy * flat[k + 1])
+         + fx * ((1 - fy) * flat[k + len(p)] + fy * flat[k + len(p) + 1]))
+    if not inside.all():
+        Z = np.where(inside, Z, np.nan)
+        outside = ~inside
+        Z[outside] = dak_z_factor(Ppr[outside], Tpr[outside])
+    return Z
+
+
+def gas_z_factor(Po, To, Sg, method="table"):
+    """
+    Gas compressibility factor from operating pressure Po (psia), temperature To (°F) and
+    gas specific gravity Sg, with Sutton pseudo-critical properties.
+    """
+    Ppc, Tpc = pseudo_critical(Sg)
+    return z_factor(np.asarray(Po, dtype=float) / Ppc, (np.asarray(To, dtype=float) + RANKINE_OFFSET) / Tpc, method)
+
+
+def gas_density(Po, To, Sg, Z=None):
+    """Gas density in lb/ft³ at Po (psia) and To (°F); Z defaults to gas_z_factor."""
+    if Z is None:
+        Z = gas_z_factor(Po, To, Sg)
+    T = np.asarray(To, dtype=float) + RANKINE_OFFSET
+    return np.asarray(Po, dtype=float) * AIR_MOLECULAR_WEIGHT * np.asarray(Sg, dtype=float) / (Z * GAS_CONSTANT * T)
+
+
+def gas_viscosity(Po, To, Sg, Z=None):
+    """Lee-Gonzalez-Eakin gas viscosity in cp at Po (psia) and To (°F); Z defaults to gas_z_factor."""
+    T = np.asarray(To, dtype=float) + RANKINE_OFFSET
+    Ma = AIR_MOLECULAR_WEIGHT * np.asarray(Sg, dtype=float)
+    density = gas_density(Po, To, Sg, Z) / 62.428  # g/cm³
+    K = (9.4 + 0.02 * Ma) * T ** 1.5 / (209 + 19 * Ma + T)
+    X = 3.5 + 986 / T + 0.01 * Ma
+    Y = 2.4 - 0.2 * X
+    return 1e-4 * K * np.exp(X * density ** Y)
+
+
+def solution_gor(API, Po, To, Sg):
+    """Standing solution gas-oil ratio in scf/STB, taking Po as the bubble point."""
+    exponent = 0.0125 * np.asarray(API, dtype=float) - 0.00091 * np.asarray(To, dtype=float)
+    return np.asarray(Sg, dtype=float) * ((np.asarray(Po, dtype=float) / 18.2 + 1.4) * 10 ** exponent) ** 1.2048
+
+
+def oil_density(API, Po, To, Sg, Rs=None):
+    """
+    Oil density in lb/ft³ at Po (psia) and To (°F) from stock-tank gravity API, with
+    Standing's solution GOR (unless Rs is given, scf/STB) and formation volume factor.
+    """
+    gamma_o = 141.5 / (131.5 + np.asarray(API, dtype=float))
+    Sg = np.asarray(Sg, dtype=float)
+    if Rs is None:
+        Rs = solution_gor(API, Po, To, Sg)
+    Bo = 0.9759 + 0.00012 * (Rs * np.sqrt(Sg / gamma_o) + 1.25 * np.asarray(To, dtype=float)) ** 1.2
+    return (62.4 * gamma_o + 0.0136 * Rs * Sg) / Bo
+
+
+def water_density(SG_w, Po, To):
+    """Water density in lb/ft³ at Po (psia) and To (°F), with McCain's formation volume factor."""
+    P = np.asarray(Po, dtype=float)
+    T = np.asarray(To, dtype=float)
+    dV_T = -1.0001e-2 + 1.33391e-4 * T + 5.50654e-7 * T ** 2
+    dV_P = -1.95301e-9 * P * T - 1.72834e-13 * P ** 2 * T - 3.58922e-7 * P - 2.25341e-10 * P ** 2
+    return WATER_DENSITY * np.asarray(SG_w, dtype=float) / ((1 + dV_P) * (1 + dV_T))
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+from engine import REQUIRED_COLUMNS, compute_result_table, rule_table
+from ingest import CHUNK_ROWS
+from results import ResultTable
+
+# Row numbers (or keys) listed per diff category; the counts are always complete
+DIFF_LISTED_ROWS = 100
+
+
+def row_hashes(data):
+    """
+    64-bit hash per row of the columns recommendations depend on.
+
+    Numeric columns are hashed as floats, so a value that reads as 5 in one revision and
+    5.0 in the next is not reported as changed; columns the rule table compares as text
+    are hashed as strings.
+    """
+    columns = {}
+    for column in REQUIRED_COLUMNS:
+        if rule_table.columns.get(column, False):
+            columns[column] = data[column].astype(str).to_numpy()
+        else:
+            columns[column] = pd.to_numeric(data[column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    return pd.util.hash_pandas_object(pd.DataFrame(columns), index=False).to_numpy()
+
+
+def _keys(data, key_column):
+    if key_column is None:
+        return None
+    if key_column not in data.columns:
+        raise KeyError(f"Missing columns: {key_column}")
+    keys = data[key_column].astype(str)
+    if not keys.is_unique:
+        raise ValueError(f"Key column {key_column} has duplicate values.")
+    return keys.to_numpy()
+
+
+def _lookup(previous_hashes, hashes):
+    # Index of each hash in previous_hashes, -1 where it is new
+    if not len(previous_hashes):
+        return np.full(len(hashes), -1)
+    order = np.argsort(previous_hashes, kind='stable')
+    ordered = previous_hashes[order]
+    position = np.minimum(np.searchsorted(ordered, hashes), len(ordered) - 1)
+    return np.where(ordered[position] == hashes, order[position], -1)
+
+
+def _match(previous, hashes, keys, key_column):
+    # Row of the previous revision each new row corresponds to, -1 for added rows
+    if previous is None:
+        return np.full(len(hashes), -1)
+    if keys is not None and previous['keys'] is not None and previous['key_column'] == key_column:
+        return pd.Index(previous['keys']).get_indexer(keys)
+    position = np.arange(len(hashes))
+    position[len(previous['hashes']):] = -1
+    return position
+
+
+def _summarize(previous, hashes, position, keys):
+    old_hashes = previous['hashes'] if previous is not None else np.empty(0, dtype=np.uint64)
+    common = position >= 0
+    added = ~common
+    changed = np.zeros(len(hashes), dtype=bool)
+    changed[common] = old_hashes[position[common]] != hashes[common]
+    removed = np.ones(len(old_hashes), dtype=bool)
+    removed[position[common]] = False
+
+    keyed = keys is not None and previous is not None and previous['keys'] is not None
+    labels = keys if keyed else np.arange(1, len(hashes) + 1)
+    old_labels = previous['keys'] if keyed else np.arange(1, len(old_hashes) + 1)
+
+    def listed(mask, values):
+        return values[np.flatnonzero(mask)[:DIFF_LISTED_ROWS]].tolist()
+
+    return {
+        'added': int(added.sum()),
+        'changed': int(changed.sum()),
+        'removed': int(removed.sum()),
+        'unchanged': int(common.sum() - changed.sum()),
+        'added_rows': listed(added, labels),
+        'changed_rows': listed(changed, labels),
+        'removed_rows': listed(removed, old_labels),
+    }
+
+
+def recompute_incremental(data, previous=None, key_column=None, fingerprint=None, compute=compute_result_table):
+    """
+    Recommendations for a new revision of a case set, recomputing only rows whose inputs
+    are not in the previous revision.
+
+    Results are reused by row content, so moved or re-keyed rows are not recomputed either;
+    nothing is reused when the previous revision was computed under another fingerprint
+    (rule table and code version).
+
+    Parameters:
+        data (DataFrame): Validated rows of the new revision.
+        previous (dict): Revision returned by the last call for this case set, or None.
+        key_column (str): Column identifying cases (e.g. a well name) for the diff; rows are
+            matched by position without one.
+        fingerprint (str): Identifies the rules and code the results were computed with.
+        compute: Callable returning a ResultTable for a DataFrame of rows.
+
+    Returns:
+        tuple: (ResultTable in input order, revision to store for the next call, diff
+        summary). The diff has added, changed, removed and unchanged counts, added_rows,
+        changed_rows (rows or keys in the new revision) and removed_rows (in the previous
+        one), each listing at most DIFF_LISTED_ROWS entries, and recomputed and reused
+        counts. Rows are matched by key when both revisions were keyed on the same column,
+        otherwise by position; row numbers are 1-based like validation errors.
+    """
+    hashes = row_hashes(data)
+    keys = _keys(data, key_column)
+    position = _match(previous, hashes, keys, key_column)
+    diff = _summarize(previous, hashes, position, keys)
+
+    source = np.full(len(hashes), -1)
+    if previous is not None and previous['fingerprint'] == fingerprint:
+        # Matched rows with the same hash reuse their own result; the rest look for the same
+        # inputs anywhere in the previous revision
+        source = position.copy()
+        same = source >= 0
+        same[same] = previous['hashes'][source[same]] == hashes[same]
+        rest = np.flatnonzero(~same)
+        source[~same] = _lookup(previous['hashes'], hashes[rest]) if len(rest) else -1
+    reused = np.flatnonzero(source >= 0)
+    missing = np.flatnonzero(source < 0)
+
+    # Reused rows first, then recomputed ones, put back in input order at the end
+    tables = [previous['results'].take(source[reused])] if len(reused) else []
+    for start in range(0, len(missing), CHUNK_ROWS):
+        tables.append(compute(data.iloc[missing[start:start + CHUNK_ROWS]]))
+    results = ResultTable.concat(tables)
+    if len(reused) and len(missing):
+        order = np.empty(len(hashes), dtype=np.intp)
+        order[np.concatenate([reused, missing])] = np.arange(len(hashes))
+        results = results.take(order)
+
+    diff['recomputed'] = len(missing)
+    diff['reused'] = len(reused)
+    revision = {'fingerprint': fingerprint, 'hashes': hashes, 'keys': keys, 'key_column': key_column,
+                'results': results}
+    return results, revision, diff
+
+
+def pack_revision(revision):
+    """A revision as a flat dict of plain arrays, for the upload cache; see unpack_revision."""
+    arrays = {f"results/{name}": array for name, array in revision['results'].to_arrays().items()}
+    arrays['fingerprint'] = np.array(revision['fingerprint'] or '', dtype=str)
+    arrays['hashes'] = revision['hashes']
+    if revision['keys'] is not None:
+        arrays['keys'] = np.array(revision['keys'], dtype=str)
+        arrays['key_column'] = np.array(revision['key_column'], dtype=str)
+    return arrays
+
+
+def unpack_revision(arrays):
+    """Rebuilds a revision from pack_revision output."""
+    keyed = 'keys' in arrays
+    return {
+        'fingerprint': str(arrays['fingerprint']) or None,
+        'hashes': arrays['hashes'],
+        'keys': arrays['keys'].astype(object) if keyed else None,
+        'key_column': str(arrays['key_column']) if keyed else None,
+        'results': ResultTable.from_arrays({name[len('results/'):]: array for name, array in arrays.items()
+                                            if name.startswith('results/')}),
+    }
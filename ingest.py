@@ -0,0 +1,168 @@
+import os
+from itertools import islice
+
+import pandas as pd
+
+from engine import REQUIRED_COLUMNS, compute_result_table, rule_table
+from metrics import span
+from validation import ValidationError, validate_upload
+
+# Rows per chunk; bounds peak memory independently of the upload size
+CHUNK_ROWS = 50000
+
+CSV_EXTENSIONS = ('.csv', '.txt')
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+OPENPYXL_EXTENSIONS = ('.xlsx', '.xlsm', '.xltx', '.xltm')
+
+
+def normalize_columns(columns):
+    # Normalize column names to avoid issues
+    return [f"Unnamed: {i}" if col is None else str(col).strip() for i, col in enumerate(columns)]
+
+
+def check_columns(columns):
+    with span('validate'):
+        missing_columns = [col for col in REQUIRED_COLUMNS if col not in columns]
+        if missing_columns:
+            raise KeyError(f"Missing columns: {', '.join(missing_columns)}")
+
+
+def _iter_excel(file_path, chunk_rows, sheet):
+    from openpyxl import load_workbook
+
+    try:
+        workbook = load_workbook(file_path, read_only=True, data_only=True)
+    except Exception:
+        raise Exception("Unable to read the file. Please ensure it is a valid Excel file.")
+
+    try:
+        worksheet = workbook[sheet] if sheet is not None else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = normalize_columns(next(rows, ()))
+        check_columns(header)
+
+        # Skip fully blank rows, which read-only worksheets report at the end of many files
+        rows = (row for row in rows if any(value is not None for value in row))
+        while True:
+            block = list(islice(rows, chunk_rows))
+            if not block:
+                break
+            yield pd.DataFrame.from_records(block, columns=header)
+    finally:
+        workbook.close()
+
+
+def _iter_legacy_excel(file_path, chunk_rows, sheet):
+    # .xls and other formats openpyxl cannot stream are read whole and sliced
+    try:
+        data = pd.read_excel(file_path, sheet_name=sheet if sheet is not None else 0)
+    except Exception:
+        raise Exception("Unable to read the file. Please ensure it is a valid Excel file.")
+    data.columns = normalize_columns(data.columns)
+    check_columns(data.columns)
+    for start in range(0, len(data), chunk_rows):
+        yield data.iloc[start:start + chunk_rows]
+
+
+def _iter_csv(file_path, chunk_rows):
+    try:
+        reader = pd.read_csv(file_path, chunksize=chunk_rows)
+    except Exception:
+        raise Exception("Unable to read the file. Please ensure it is a valid CSV file.")
+    with reader:
+        checked = False
+        for chunk in reader:
+            chunk.columns = normalize_columns(chunk.columns)
+            if not checked:
+                check_columns(chunk.columns)
+                checked = True
+            yield chunk
+
+
+def _iter_parquet(file_path, chunk_rows):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet uploads require the pyarrow package.")
+
+    try:
+        parquet_file = pq.ParquetFile(file_path)
+    except Exception:
+        raise Exception("Unable to read the file. Please ensure it is a valid Parquet file.")
+    header = normalize_columns(parquet_file.schema_arrow.names)
+    check_columns(header)
+    for batch in parquet_file.iter_batches(batch_size=chunk_rows):
+        chunk = batch.to_pandas()
+        chunk.columns = header
+        yield chunk
+
+
+def iter_chunks(file_path, chunk_rows=CHUNK_ROWS, sheet=None):
+    """
+    Streams an uploaded Excel, CSV or Parquet file as DataFrames of at most chunk_rows rows.
+
+    Required columns are checked against the header before any rows are read, raising
+    KeyError like process_file does.
+
+    Parameters:
+        file_path (str): Path to the upload; the format is picked from its extension.
+        chunk_rows (int): Maximum rows per yielded DataFrame.
+        sheet (str): Worksheet name for Excel files; defaults to the first sheet.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in CSV_EXTENSIONS:
+        return _iter_csv(file_path, chunk_rows)
+    if extension in PARQUET_EXTENSIONS:
+        return _iter_parquet(file_path, chunk_rows)
+    if extension in OPENPYXL_EXTENSIONS:
+        return _iter_excel(file_path, chunk_rows, sheet)
+    return _iter_legacy_excel(file_path, chunk_rows, sheet)
+
+
+def iter_valid_chunks(file_path, chunk_rows=CHUNK_ROWS, sheet=None):
+    """
+    Yields the chunks of iter_chunks after validating each one.
+
+    Each chunk is yielded as soon as it has been validated, before later chunks are read.
+    This keeps memory bounded, but the caller may already have used chunks that come
+    before an invalid row. Once a chunk has invalid rows nothing more is yielded, and the
+    rest of the file is still validated so the ValidationError raised at the end lists
+    every bad row. Use list() on it to validate the whole upload before using any chunk.
+    """
+    chunks = iter_chunks(file_path, chunk_rows, sheet)
+    errors = []
+    first_row = 1
+    while True:
+        with span('parse'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with span('validate'):
+            errors.extend(validate_upload(chunk, first_row))
+        first_row += len(chunk)
+        if not errors:
+            yield chunk
+    if errors:
+        raise ValidationError(errors)
+
+
+def iter_recommendation_chunks(file_path, chunk_rows=CHUNK_ROWS, sheet=None, stream=True):
+    """
+    Yields one ResultTable of recommendations per validated input chunk.
+
+    With stream=True each chunk is computed as soon as it validates, so input memory stays
+    bounded. An invalid row near the end of the file then only fails the upload after the
+    chunks before it were sized; their separator rule hits are recorded once the whole
+    file has validated, so discarded decisions never reach the metrics. With stream=False
+    every chunk is read and validated before the first is computed, holding the parsed
+    input in memory but computing nothing for an upload that will be rejected.
+    """
+    chunks = iter_valid_chunks(file_path, chunk_rows, sheet)
+    if not stream:
+        chunks = list(chunks)
+    hits = rule_table.new_hits()
+    for chunk in chunks:
+        with span('compute'):
+            results = compute_result_table(chunk, hits=hits)
+        yield results
+    rule_table.record_hits(hits)
@@ -0,0 +1,100 @@
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from store import new_job_id
+
+
+def describe_upload_error(error):
+    """User-facing message for an exception raised while processing an upload."""
+    if isinstance(error, KeyError):
+        return f"Error: Missing expected column(s): {str(error)} in the file."
+    if isinstance(error, ValueError):
+        return f"Error: {str(error)}"
+    return f"Error processing file: {str(error)}"
+
+
+class JobQueue:
+    """
+    Runs uploads in a background thread pool and tracks their progress.
+
+    Finished results are written to the result store under the job ID, so they are served by
+    the same /results/<job_id> routes as synchronous uploads. Job status lives in this
+    process; other processes only see finished jobs, through the result store.
+
+    Parameters:
+        result_store: MemoryResultStore or SQLiteResultStore receiving finished results.
+        max_workers (int): Number of uploads processed concurrently.
+        max_jobs (int): Number of job statuses remembered; the oldest finished ones are dropped.
+        process: Callable(file_path, progress=callback, **options) returning (ResultTable,
+            details dict or None), the same pipeline synchronous uploads use; progress is
+            called with the rows processed so far.
+    """
+
+    def __init__(self, result_store, process, max_workers=2, max_jobs=1000):
+        self.result_store = result_store
+        self.max_jobs = max_jobs
+        self.process = process
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upload-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, file_path, cleanup_dir=None, **options):
+        """
+        Queues file_path for processing and returns the job ID immediately.
+
+        cleanup_dir, if given, is removed once the job has finished; options are passed to
+        process. The details process returns are reported in the job status.
+        """
+        job_id = new_job_id()
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "state": "queued",
+                "rows_processed": 0,
+                "error": None,
+                "details": None,
+                "submitted": time.time(),
+                "started": None,
+                "finished": None,
+            }
+            self._trim()
+        self._executor.submit(self._run, job_id, file_path, cleanup_dir, options)
+        return job_id
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _run(self, job_id, file_path, cleanup_dir, options):
+        self._update(job_id, state="running", started=time.time())
+        try:
+            results, details = self.process(file_path, progress=lambda rows: self._update(job_id, rows_processed=rows),
+                                            **options)
+            self.result_store.put(results, job_id=job_id)
+            self._update(job_id, state="done", rows_processed=len(results), details=details,
+                         finished=time.time())
+        except Exception as e:
+            self._update(job_id, state="failed", error=describe_upload_error(e), finished=time.time())
+        finally:
+            if cleanup_dir:
+                shutil.rmtree(cleanup_dir, ignore_errors=True)
+
+    def _trim(self):
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id]["state"] in ("done", "failed"):
+                del self._jobs[job_id]
+
+    def status(self, job_id):
+        """Returns a copy of the job's status dict, or None for unknown jobs."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
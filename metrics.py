@@ -0,0 +1,149 @@
+import bisect
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds in seconds for latency histograms
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Thread-safe registry of labelled latency histograms, rendered in Prometheus text format.
+
+    While disabled, span() returns a shared no-op context manager and nothing is recorded.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self._histograms = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, metric, text):
+        self._help[metric] = text
+
+    def observe(self, metric, label, value, seconds):
+        with self._lock:
+            histogram = self._histograms.get((metric, label, value))
+            if histogram is None:
+                histogram = self._histograms[(metric, label, value)] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def _timed(self, metric, label, value):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(metric, label, value, time.perf_counter() - start)
+
+    def span(self, stage):
+        """Times the enclosed block as one observation of separator_stage_seconds{stage=...}."""
+        if not self.enabled:
+            return nullcontext()
+        return self._timed('separator_stage_seconds', 'stage', stage)
+
+    def timed_iter(self, stage, iterable):
+        """
+        Yields from iterable, recording the total time spent producing its items as one
+        observation once it is exhausted. Used for streamed responses, whose work happens
+        after the view function has returned.
+        """
+        if not self.enabled:
+            yield from iterable
+            return
+        elapsed = 0.0
+        iterator = iter(iterable)
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            self.observe('separator_stage_seconds', 'stage', stage, elapsed)
+
+    def render(self):
+        """All histograms in Prometheus text exposition format."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            lines = []
+            described = set()
+            for (metric, label, value), histogram in items:
+                if metric not in described:
+                    described.add(metric)
+                    if metric in self._help:
+                        lines.append(f"# HELP {metric} {self._help[metric]}")
+                    lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.sum}')
+                lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+registry = Metrics(enabled=os.environ.get('METRICS_ENABLED', '1').lower() not in ('0', 'false', 'no'))
+registry.describe('separator_stage_seconds', "Time spent per pipeline stage (parse, validate, compute, render, export).")
+registry.describe('separator_request_seconds', "Request latency per Flask endpoint.")
+span = registry.span
+timed_iter = registry.timed_iter
+
+
+def render_gauges(name, values, help_text):
+    """Prometheus lines for a dict of numeric gauges sharing a metric prefix."""
+    lines = []
+    for key, value in values.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        lines.append(f"# HELP {name}_{key} {help_text}")
+        lines.append(f"# TYPE {name}_{key} gauge")
+        lines.append(f"{name}_{key} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class RequestProfiler:
+    """
+    Optional per-request cProfile capture; each profiled request is dumped to
+    <directory>/<timestamp>-<endpoint>.prof for inspection with pstats or snakeviz.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def start(self):
+        profiler = cProfile.Profile()
+        profiler.enable()
+        return profiler
+
+    def stop(self, profiler, endpoint):
+        profiler.disable()
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns() % 1000000:06d}-{endpoint or 'unknown'}.prof"
+        profiler.dump_stats(os.path.join(self.directory, name))
@@ -0,0 +1,275 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sizing import DROPLET_DEFAULTS, INPUTS, PARAMETERS, calculate_separator_batch
+
+DISTRIBUTIONS = {
+    'fixed': ('value',),
+    'uniform': ('low', 'high'),
+    'normal': ('mean', 'std'),
+    'lognormal': ('mean', 'sigma'),
+    'triangular': ('low', 'mode', 'high'),
+}
+
+# Samples sized per vectorized batch; each batch draws from its own child seed
+BATCH_SAMPLES = 100000
+
+# Relative accuracy of the streaming histograms: bucket edges grow by a constant factor, so
+# a percentile is within this fraction of the exact one however skewed the output is
+HISTOGRAM_ACCURACY = 1e-3
+
+# Magnitudes the log-spaced buckets cover; smaller values count as zero, larger ones land in
+# the last bucket (percentiles are still clamped to the exact min and max)
+HISTOGRAM_RANGE = (1e-9, 1e9)
+
+PERCENTILES = (10, 50, 90)
+
+METRICS = {
+    'Vertical': ('diameter', 'height', 'length', 'slenderness_ratio', 'drag_coefficient'),
+    'Horizontal': ('diameter', 'dLeff_gas', 'dLeff_retention', 'drag_coefficient'),
+}
+OPTIMAL_METRICS = ('optimal_diameter', 'optimal_length', 'optimal_volume')
+
+
+class StreamingHistogram:
+    """
+    Mergeable histogram over fixed log-spaced buckets, for percentiles over more samples
+    than fit in memory.
+
+    Positive and negative values each fall in buckets whose edges grow by a factor of
+    (1 + accuracy) / (1 - accuracy) across HISTOGRAM_RANGE, with one bucket for values
+    closer to zero, so every bucket spans the same relative width and heavy-tailed outputs
+    keep their resolution. The grid never changes, so histograms of different batches merge
+    by adding counts.
+    """
+
+    def __init__(self, accuracy=HISTOGRAM_ACCURACY, value_range=HISTOGRAM_RANGE):
+        self.accuracy = accuracy
+        self.value_range = value_range
+        low, high = value_range
+        self._log_gamma = math.log((1 + accuracy) / (1 - accuracy))
+        # Buckets per sign; the counts hold the negative buckets (most negative first), the
+        # zero bucket, then the positive buckets
+        self.buckets = int(math.ceil(math.log(high / low) / self._log_gamma))
+        self.counts = np.zeros(2 * self.buckets + 1, dtype=np.int64)
+        self.count = 0
+        self.invalid = 0
+        self.sum = 0.0
+        self.sum_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def edges(self):
+        """Bucket edges in value order, one more than there are counts."""
+        magnitudes = self.value_range[0] * np.exp(self._log_gamma * np.arange(self.buckets + 1))
+        return np.concatenate([-magnitudes[::-1], magnitudes])
+
+    def _index(self, values):
+        index = np.full(values.size, self.buckets, dtype=np.int64)
+        magnitude = np.abs(values)
+        outside = magnitude >= self.value_range[0]
+        bucket = np.minimum(np.floor(np.log(magnitude[outside] / self.value_range[0]) / self._log_gamma),
+                            self.buckets - 1).astype(np.int64)
+        index[outside] = np.where(values[outside] > 0, self.buckets + 1 + bucket, self.buckets - 1 - bucket)
+        return index
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        finite = values[np.isfinite(values)]
+        self.invalid += values.size - finite.size
+        if finite.size == 0:
+            return
+        self.min = min(self.min, float(finite.min()))
+        self.max = max(self.max, float(finite.max()))
+        self.count += finite.size
+        self.sum += float(finite.sum())
+        self.sum_squares += float(np.square(finite).sum())
+        self.counts += np.bincount(self._index(finite), minlength=self.counts.size)
+
+    def merge(self, other):
+        """Adds the counts of another StreamingHistogram with the same accuracy and range."""
+        if (other.accuracy, other.value_range) != (self.accuracy, self.value_range):
+            raise ValueError("Histograms with different accuracy or range cannot be merged")
+        self.counts += other.counts
+        self.invalid += other.invalid
+        self.count += other.count
+        self.sum += other.sum
+        self.sum_squares += other.sum_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def percentile(self, q):
+        """Approximate q-th percentile, interpolating linearly inside the bucket it falls in."""
+        if not self.count:
+            return math.nan
+        target = q / 100 * self.count
+        cumulative = np.cumsum(self.counts)
+        i = min(int(np.searchsorted(cumulative, target)), self.counts.size - 1)
+        before = cumulative[i - 1] if i else 0
+        fraction = (target - before) / self.counts[i] if self.counts[i] else 0.0
+        # Only the bucket's own edges are needed; clamp them to the values actually seen
+        edges = self.edges()
+        low, high = max(edges[i], self.min), min(edges[i + 1], self.max)
+        value = low + fraction * (high - low) if high > low else low
+        return float(min(max(value, self.min), self.max))
+
+    def histogram(self, bins=50):
+        """(edges, counts) over [min, max] with `bins` equal bins, re-binned from the buckets."""
+        if not self.count:
+            return [], []
+        edges = np.linspace(self.min, self.max, bins + 1)
+        fine_edges = np.clip(self.edges(), self.min, self.max)
+        cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+        at_edges = np.rint(np.interp(edges, fine_edges, cumulative)).astype(np.int64)
+        at_edges[0], at_edges[-1] = 0, self.count
+        return edges.tolist(), np.diff(at_edges).tolist()
+
+    def summary(self, percentiles=PERCENTILES, histogram_bins=50):
+        mean = self.sum / self.count if self.count else math.nan
+        variance = self.sum_squares / self.count - mean ** 2 if self.count else math.nan
+        edges, counts = self.histogram(histogram_bins)
+        result = {
+            'count': self.count,
+            'invalid': self.invalid,
+            'mean': mean,
+            'std': math.sqrt(max(variance, 0.0)) if self.count else math.nan,
+            'min': self.min if self.count else math.nan,
+            'max': self.max if self.count else math.nan,
+        }
+        for q in percentiles:
+            result[f"P{q:g}"] = self.percentile(q)
+        result['histogram'] = {'edges': edges, 'counts': counts}
+        return result
+
+
+def _check_distribution(name, spec):
+    if isinstance(spec, (int, float)) and not isinstance(spec, bool):
+        return {'dist': 'fixed', 'value': float(spec)}
+    if not isinstance(spec, dict) or spec.get('dist') not in DISTRIBUTIONS:
+        raise ValueError(f"{name}: expected a number or a dict with 'dist' in {', '.join(DISTRIBUTIONS)}")
+    missing = [key for key in DISTRIBUTIONS[spec['dist']] if key not in spec]
+    if missing:
+        raise ValueError(f"{name}: {spec['dist']} distribution needs {', '.join(missing)}")
+    try:
+        return {key: value if key == 'dist' else float(value) for key, value in spec.items()}
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: distribution parameters must be numbers")
+
+
+def sample(spec, rng, size):
+    """
+    Draws `size` values from a distribution spec.
+
+    Parameters:
+        spec (dict): {'dist': 'fixed'|'uniform'|'normal'|'lognormal'|'triangular', ...} with
+            the parameters listed in DISTRIBUTIONS, plus optional 'min'/'max' clipping bounds.
+            lognormal takes the mean and sigma of the underlying normal.
+        rng (Generator): numpy random generator.
+    """
+    dist = spec['dist']
+    if dist == 'fixed':
+        values = np.full(size, spec['value'])
+    elif dist == 'uniform':
+        values = rng.uniform(spec['low'], spec['high'], size)
+    elif dist == 'normal':
+        values = rng.normal(spec['mean'], spec['std'], size)
+    elif dist == 'lognormal':
+        values = rng.lognormal(spec['mean'], spec['sigma'], size)
+    else:
+        values = rng.triangular(spec['low'], spec['mode'], spec['high'], size)
+    if 'min' in spec or 'max' in spec:
+        values = np.clip(values, spec.get('min', -np.inf), spec.get('max', np.inf))
+    return values
+
+
+def _run_batch(specs, separator_type, size, seed, accuracy, optimize):
+    # Sizes one batch of samples and returns a histogram per metric; runs in worker processes
+    rng = np.random.default_rng(seed)
+    inputs = {name: sample(specs[name], rng, size) for name in PARAMETERS}
+    sized = calculate_separator_batch(**inputs, separator_type=separator_type)
+    metrics = {name: sized[name] for name in METRICS[separator_type]}
+    if optimize:
+        from optimizer import optimize_horizontal
+
+        design = optimize_horizontal(**{name: inputs[name] for name in INPUTS})
+        metrics.update(zip(OPTIMAL_METRICS, (design['diameter'], design['length'], design['volume'])))
+    histograms = {}
+    for name, values in metrics.items():
+        histograms[name] = StreamingHistogram(accuracy)
+        histograms[name].add(values)
+    return histograms
+
+
+def run_monte_carlo(inputs, separator_type, samples=100000, seed=None, workers=None, batch_samples=BATCH_SAMPLES,
+                    accuracy=HISTOGRAM_ACCURACY, percentiles=PERCENTILES, histogram_bins=50, optimize=False):
+    """
+    Propagates input uncertainty through the sizing core.
+
+    Samples are drawn and sized in vectorized batches. Each batch gets its own child of a
+    SeedSequence and is reduced to fixed-size histograms, so memory stays bounded for any
+    sample count and a given seed gives the same result for any number of workers.
+
+    Parameters:
+        inputs (dict): Value or distribution spec (see sample) per name in PARAMETERS. Missing
+            droplet sizes default to the design values in sizing.
+        separator_type (str): 'Vertical' or 'Horizontal'.
+        samples (int): Total number of samples.
+        seed (int): Seed for reproducible runs; None draws fresh entropy (reported back).
+        workers (int): Processes to spread batches over; None or 1 runs in this process.
+        batch_samples (int): Samples per batch.
+        accuracy (float): Relative accuracy of the reported percentiles (see StreamingHistogram).
+        percentiles (tuple): Percentiles to report, e.g. (10, 50, 90) for P10/P50/P90.
+        histogram_bins (int): Bins in the reported histograms.
+        optimize (bool): Also run the horizontal optimizer and summarize the optimal design.
+
+    Returns:
+        dict: samples, seed, separator_type and a summary per metric with count, invalid
+        (NaN or infinite results), mean, std, min, max, P<q> and histogram.
+    """
+    kind = str(separator_type).capitalize()
+    if kind not in METRICS:
+        raise ValueError("Invalid separator type")
+    if optimize and kind != 'Horizontal':
+        raise ValueError("The optimizer only applies to horizontal separators")
+    if samples < 1 or batch_samples < 1:
+        raise ValueError("samples and batch_samples must be positive")
+    unknown = [name for name in inputs if name not in PARAMETERS]
+    if unknown:
+        raise ValueError(f"Unknown inputs: {', '.join(unknown)}")
+    missing = [name for name in INPUTS if name not in inputs]
+    if missing:
+        raise ValueError(f"Missing inputs: {', '.join(missing)}")
+    specs = {name: _check_distribution(name, inputs.get(name, DROPLET_DEFAULTS.get(name))) for name in PARAMETERS}
+
+    sequence = np.random.SeedSequence(seed)
+    sizes = [batch_samples] * (samples // batch_samples)
+    if samples % batch_samples:
+        sizes.append(samples % batch_samples)
+    seeds = sequence.spawn(len(sizes))
+    args = [(specs, kind, size, child, accuracy, optimize) for size, child in zip(sizes, seeds)]
+
+    totals = {}
+    if workers and workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args), os.cpu_count() or 1)) as executor:
+            batches = executor.map(_run_batch, *zip(*args))
+            for histograms in batches:
+                _merge_into(totals, histograms, accuracy)
+    else:
+        for batch in args:
+            _merge_into(totals, _run_batch(*batch), accuracy)
+
+    return {
+        'samples': samples,
+        'seed': sequence.entropy,
+        'separator_type': kind,
+        'metrics': {name: histogram.summary(percentiles, histogram_bins) for name, histogram in totals.items()},
+    }
+
+
+def _merge_into(totals, histograms, accuracy):
+    for name, histogram in histograms.items():
+        totals.setdefault(name, StreamingHistogram(accuracy)).merge(histogram)
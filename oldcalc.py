@@ -3,8 +3,8 @@ import os
 import pandas as pd
 from werkzeug.utils import secure_filename
 from fpdf import FPDF
-from math import sqrt, pi
 import tempfile
+from sizing import size_separator
 
 app = Flask(__name__)
 app.config['UPLOAD_FOLDER'] = './uploads'
@@ -27,7 +27,7 @@ def calc():
             Qo = float(request.form['Qo']) 
             Qw = float(request.form['Qw'])  
             Po = float(request.form['P'])  # psia
-            To = float(request.form['T']) + 459.67  # Convert °F to °R
+            To = float(request.form['T'])  # °F
             Sg = float(request.form['Sg'])  # Specific gravity of gas
             SG_o = float(request.form['SG_o'])  # Specific gravity of Oil
             SG_w = float(request.form['SG_w'])  # Specific gravity of water
@@ -42,69 +42,7 @@ def calc():
             # retention_time = float(request.form['retention_time']) * 60  # Convert minutes to seconds
             separator_type = request.form['separator_type']  # Vertical or Horizontal
 
-            liquid_d_m = 100
-            water_d_m = 500
-            oil_d_m = 200
-
-
-            liquid_density_pl = 62.4 * (141.5 / (131,5 + SG_o)) #Liquid density
-            gas_density_pg = (2.7 * Sg * P) / (T * Z) #Gas density
-
-            Cd = 0.25
-            Vt = 0.0119 * ((liquid_density_pl - gas_density_pg) / gas_density_pg * liquid_d_m/Cd) #Settling velocity
-            Re = 0.0049 * (gas_density_pg * liquid_d_m * Vt ) / M
-            Cd = 24/Re + 3/(Re ** 0.5) + 0.34
-
-            for i in range(5):
-                Vt = 0.0119 * ((liquid_density_pl - gas_density_pg) / gas_density_pg * liquid_d_m/Cd) #Settling velocity
-                Re = 0.0049 * (gas_density_pg * liquid_d_m * Vt ) / M
-                Cd = 24/Re + 3/(Re ** 0.5) + 0.34
-            
-
-
-            dSG = (SG_w - (141.5) / (131.5 + SG_o)) #Gravity Difference 
-            if separator_type == "Vertical":
-                d_liquid = 5040 * (T * Z * Qg / P) * ((gas_density_pg / (liquid_density_pl - gas_density_pg)) * (0.25 / liquid_d_m))**0.25
-                d_water = 5040 * (T * Z * Qg / P) * ((gas_density_pg / (liquid_density_pl - gas_density_pg)) * (0.25 / water_d_m))**0.25
-                d_oil = 5040 * (T * Z * Qg / P) * ((gas_density_pg / (liquid_density_pl - gas_density_pg)) * (0.25 / oil_d_m))**0.25
-
-                D = max(d_liquid, d_water, d_oil)
-
-                H = (tr_o * Qo + tr_w * Qw) / (0.12 * D ** 2) #Height for Oil &Water retention
-
-                #Seam to Seam length
-                if D <= 36:
-                    Lss = (H +76) / 12
-                else:
-                    Lss = (H + D + 40) / 12
-
-                SR = (12 * Lss) / D # Compute Slenderness Ratio (SR)
-
-
-            elif separator_type == "Horizontal":
-                H = (1.28 * (10 ** (-3)) * (tr_o * dSG * (water_d_m ** 2))) / M # Max oil pad thickness
-
-                AA = 0.5 * Qw * tr_w / (tr_o * Qo + tr_w * Qw)
-
-                D = H / B
-                dLeff = 5040 * (T * Z * Qg / P) * ((gas_density_pg / (liquid_density_pl - gas_density_pg)) * (0.25 / oil_d_m))**0.5
-
-
-            else:
-                raise ValueError("Invalid separator type")
-
-            results = {
-                "density_gas": f"{gas_density_pg:.2f}",
-                "sg_oil": f"{SG_o:.3f}",
-                "density_oil": f"{rho_o:.2f}",
-                "density_water": f"{rho_w:.2f}",
-                "volume_liquid": f"{V_liquid:.2f}",
-                "velocity": f"{v:.3f}",
-                "area": f"{A:.2f}",
-                "diameter": f"{D:.2f}",
-                "length": f"{length:.2f}",
-                "volume_gas": f"{V_gas:.2f}"
-            }
+            results = size_separator(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, separator_type)
 
             return render_template('calc.html', results=results)
 
@@ -0,0 +1,188 @@
+import numpy as np
+
+from sizing import calculate_separator_batch
+
+# Diameter search range in inches
+DIAMETER_MIN = 12.0
+DIAMETER_MAX = 240.0
+
+# Slenderness ratio (12 * Lss / d) window for horizontal vessels
+SR_MIN = 3.0
+SR_MAX = 5.0
+
+# Diameters evaluated per row in the coarse pass and in each refinement pass around the best one
+GRID_POINTS = 64
+REFINE_ROUNDS = 3
+
+# Shell weight: ASME thin-wall thickness with 2:1 ellipsoidal heads, carbon steel
+STEEL_DENSITY = 490.0  # lb/ft³
+ALLOWABLE_STRESS = 20000.0  # psi
+JOINT_EFFICIENCY = 0.85
+CORROSION_ALLOWANCE = 0.125  # in
+HEAD_AREA_FACTOR = 1.084  # Surface of one 2:1 ellipsoidal head per D²
+
+# Rows optimized together; bounds the (rows, GRID_POINTS) work arrays
+BLOCK_ROWS = 8192
+
+OBJECTIVES = ("volume", "weight")
+GOVERNING = np.array(["gas", "retention", "slenderness", "infeasible"], dtype=object)
+
+
+def shell_thickness(Po, d, allowable_stress=ALLOWABLE_STRESS, joint_efficiency=JOINT_EFFICIENCY,
+                    corrosion_allowance=CORROSION_ALLOWANCE):
+    """Shell wall thickness in inches for design pressure Po (psi) and diameter d (in)."""
+    return Po * d / (2 * allowable_stress * joint_efficiency - 1.2 * Po) + corrosion_allowance
+
+
+def design_length(d, dLeff_gas, d2Leff_retention, sr_min=SR_MIN):
+    """
+    Shortest horizontal design for diameter d that meets gas capacity and retention.
+
+    Parameters:
+        d: Vessel inside diameter in inches.
+        dLeff_gas: Gas capacity constraint d * Leff in in·ft.
+        d2Leff_retention: Retention constraint d² * Leff in in²·ft.
+        sr_min: Lower slenderness ratio bound; the vessel is lengthened to reach it.
+
+    Returns:
+        tuple: (Leff, Lss, governing) where governing indexes GOVERNING.
+    """
+    Leff_gas = dLeff_gas / d
+    Leff_retention = d2Leff_retention / d ** 2
+    Leff = np.maximum(Leff_gas, Leff_retention)
+    # Seam-to-seam length: Leff + d/12 when gas capacity governs, 4/3 Leff for liquid capacity
+    Lss = np.maximum(Leff + d / 12, 4 / 3 * Leff)
+    Lss_sr = sr_min * d / 12
+    governing = np.where(Lss_sr > Lss, 2, np.where(Leff_gas >= Leff_retention, 0, 1))
+    return Leff, np.maximum(Lss, Lss_sr), governing
+
+
+def design_cost(d, Lss, Po, objective, **shell):
+    """Vessel volume in ft³ or shell weight in lb for diameter d (in) and length Lss (ft)."""
+    D = d / 12
+    if objective == "volume":
+        return np.pi / 4 * D ** 2 * Lss
+    t = shell_thickness(Po, d, **shell) / 12
+    return STEEL_DENSITY * t * (np.pi * D * Lss + 2 * HEAD_AREA_FACTOR * D ** 2)
+
+
+def _search(d_low, d_high, dLeff_gas, d2Leff_retention, Po, sr_min, sr_max, objective, grid, shell):
+    # Evaluates `grid` diameters between d_low and d_high for every row; returns the best one
+    # per row and its cost, inf where none is feasible
+    fractions = np.linspace(0.0, 1.0, grid)
+    d = d_low[:, np.newaxis] + (d_high - d_low)[:, np.newaxis] * fractions
+    gas, retention, pressure = dLeff_gas[:, np.newaxis], d2Leff_retention[:, np.newaxis], Po[:, np.newaxis]
+    Leff, Lss, _ = design_length(d, gas, retention, sr_min)
+    cost = design_cost(d, Lss, pressure, objective, **shell)
+    feasible = (12 * Lss / d <= sr_max) & np.isfinite(cost) & (cost > 0)
+    cost = np.where(feasible, cost, np.inf)
+    best = np.argmin(cost, axis=1)
+    rows = np.arange(len(d))
+    return d[rows, best], cost[rows, best]
+
+
+def optimize_horizontal(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, d_min=DIAMETER_MIN,
+                        d_max=DIAMETER_MAX, sr_min=SR_MIN, sr_max=SR_MAX, objective="volume", grid=GRID_POINTS,
+                        refine=REFINE_ROUNDS, allowable_stress=ALLOWABLE_STRESS, joint_efficiency=JOINT_EFFICIENCY,
+                        corrosion_allowance=CORROSION_ALLOWANCE):
+    """
+    Finds the smallest feasible horizontal separator for many cases at once.
+
+    The gas capacity (d * Leff) and retention (d² * Leff) constraints come from the same
+    calculation as the /calc candidate table. For any diameter the shortest length meeting
+    both, lengthened to the minimum slenderness ratio if needed, is the cheapest design, so
+    the search runs over diameter: a coarse grid over [d_min, d_max] followed by `refine`
+    finer grids around the best point of the previous pass. A refined point replaces the
+    previous best only when it is cheaper, so refinement never returns a worse design.
+    Designs above sr_max are infeasible.
+
+    Parameters:
+        Qg ... B: Same as sizing.calculate_separator_batch, scalars or arrays.
+        d_min, d_max: Diameter search range in inches.
+        sr_min, sr_max: Slenderness ratio window.
+        objective (str): "volume" (ft³) or "weight" (shell and heads, lb).
+        grid (int): Diameters evaluated per row in each pass.
+        refine (int): Refinement passes after the coarse grid.
+        allowable_stress, joint_efficiency, corrosion_allowance: Shell thickness inputs for "weight".
+
+    Returns:
+        dict: Per-case arrays diameter (in), effective_length and length (ft), slenderness_ratio,
+        volume (ft³), weight (lb), shell_thickness (in), governing ("gas", "retention",
+        "slenderness" or "infeasible") and feasible. Numeric outputs are NaN where no
+        design in the range satisfies the constraints.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective {objective!r}; expected one of {', '.join(OBJECTIVES)}")
+    if not 0 < d_min < d_max:
+        raise ValueError("Diameter range must satisfy 0 < d_min < d_max")
+    if not 0 < sr_min <= sr_max:
+        raise ValueError("Slenderness ratio window must satisfy 0 < sr_min <= sr_max")
+    if grid < 3:
+        raise ValueError("grid must be at least 3")
+
+    sized = calculate_separator_batch(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, "Horizontal")
+    dLeff_gas = sized["dLeff_gas"]
+    d2Leff_retention = (12 * sized["dLeff_retention"]) ** 2
+    Po = np.broadcast_to(np.asarray(Po, dtype=float), dLeff_gas.shape)
+    shell = {"allowable_stress": allowable_stress, "joint_efficiency": joint_efficiency,
+             "corrosion_allowance": corrosion_allowance}
+
+    n = len(dLeff_gas)
+    d = np.empty(n)
+    feasible = np.empty(n, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for start in range(0, n, BLOCK_ROWS):
+            block = slice(start, start + BLOCK_ROWS)
+            args = (dLeff_gas[block], d2Leff_retention[block], Po[block], sr_min, sr_max, objective, grid, shell)
+            low = np.full(len(args[0]), float(d_min))
+            high = np.full(len(args[0]), float(d_max))
+            best, cost = _search(low, high, *args)
+            step = (high - low) / (grid - 1)
+            for _ in range(refine):
+                low = np.maximum(best - step, d_min)
+                high = np.minimum(best + step, d_max)
+                # The refine grid need not contain the incumbent; keep it unless beaten
+                refined, refined_cost = _search(low, high, *args)
+                better = refined_cost < cost
+                best = np.where(better, refined, best)
+                cost = np.where(better, refined_cost, cost)
+                step = (high - low) / (grid - 1)
+            d[block] = best
+            feasible[block] = np.isfinite(cost)
+
+        Leff, Lss, governing = design_length(d, dLeff_gas, d2Leff_retention, sr_min)
+        thickness = shell_thickness(Po, d, **shell)
+        volume = design_cost(d, Lss, Po, "volume")
+        weight = design_cost(d, Lss, Po, "weight", **shell)
+
+    def masked(values):
+        return np.where(feasible, values, np.nan)
+
+    return {
+        "diameter": masked(d),
+        "effective_length": masked(Leff),
+        "length": masked(Lss),
+        "slenderness_ratio": masked(12 * Lss / d),
+        "volume": masked(volume),
+        "weight": masked(weight),
+        "shell_thickness": masked(thickness),
+        "governing": GOVERNING[np.where(feasible, governing, 3)],
+        "feasible": feasible,
+    }
+
+
+def optimal_design(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, objective="volume"):
+    """
+    Minimum-volume (or weight) horizontal design for a single case, rounded for calc.html.
+
+    Returns:
+        dict: diameter, effective_length, length, slenderness_ratio, volume, weight,
+        shell_thickness and governing; None if no design in the search range is feasible.
+    """
+    design = optimize_horizontal(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, objective=objective)
+    if not design["feasible"][0]:
+        return None
+    results = {key: round(float(design[key][0]), 2) for key in
+               ("diameter", "effective_length", "length", "slenderness_ratio", "volume", "weight", "shell_thickness")}
+    results["governing"] = design["governing"][0]
+    return results
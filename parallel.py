@@ -0,0 +1,201 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import pandas as pd
+
+from engine import compute_result_table
+from ingest import (CHUNK_ROWS, CSV_EXTENSIONS, OPENPYXL_EXTENSIONS, PARQUET_EXTENSIONS, check_columns,
+                    iter_chunks, normalize_columns)
+from results import ResultTable
+from validation import ValidationError, validate_upload
+
+# Rows per partition sent to a worker process
+PARTITION_ROWS = 100000
+
+# Lines read to estimate the bytes per row of a CSV file
+CSV_SAMPLE_ROWS = 1000
+
+# Block size for scanning a CSV file for quotes before splitting it
+CSV_SCAN_BYTES = 1 << 20
+
+# Formats that split into several partitions without being told which parts to read.
+# Excel files only split by sheet, and uploads read a single sheet, so they are not listed
+PARALLEL_EXTENSIONS = CSV_EXTENSIONS + PARQUET_EXTENSIONS
+
+
+def _excel_partitions(file_path, sheets):
+    # One partition per worksheet: read-only workbooks parse every row before min_row, so
+    # splitting a sheet by row range would re-read its prefix in every partition
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if sheets is None:
+            names = [workbook.sheetnames[0]]
+        elif sheets == 'all':
+            names = list(workbook.sheetnames)
+        else:
+            names = list(sheets)
+
+        partitions = []
+        for name in names:
+            worksheet = workbook[name]
+            check_columns(normalize_columns(next(worksheet.iter_rows(max_row=1, values_only=True), ())))
+            partitions.append((name, 0, None))
+        return partitions
+    finally:
+        workbook.close()
+
+
+def _has_quotes(f):
+    # Whether the rest of the file contains a quote character, read in blocks
+    for block in iter(lambda: f.read(CSV_SCAN_BYTES), b''):
+        if b'"' in block:
+            return True
+    return False
+
+
+def _csv_partitions(file_path, partition_rows):
+    # Byte ranges of about partition_rows rows each, aligned to line starts, so every worker
+    # reads only its own part of the file
+    header = pd.read_csv(file_path, nrows=0).columns
+    check_columns(normalize_columns(header))
+    size = os.path.getsize(file_path)
+    with open(file_path, 'rb') as f:
+        f.readline()
+        data_start = f.tell()
+        # Quoted fields may contain newlines, so a line start is not necessarily a row start
+        if _has_quotes(f):
+            return [(None, data_start, size)]
+        f.seek(data_start)
+        sample = b''.join(islice(f, CSV_SAMPLE_ROWS))
+        sample_rows = sample.count(b'\n') or 1
+        partition_bytes = max(len(sample) // sample_rows * partition_rows, 1)
+
+        offsets = [data_start]
+        while offsets[-1] + partition_bytes < size:
+            f.seek(offsets[-1] + partition_bytes - 1)
+            f.readline()
+            if f.tell() >= size:
+                break
+            offsets.append(f.tell())
+    return [(None, start, end) for start, end in zip(offsets, offsets[1:] + [size])]
+
+
+def _parquet_partitions(file_path):
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(file_path)
+    check_columns(normalize_columns(parquet_file.schema_arrow.names))
+    return [(None, group, None) for group in range(parquet_file.num_row_groups)]
+
+
+def plan_partitions(file_path, sheets=None, partition_rows=PARTITION_ROWS):
+    """
+    Splits an upload into independent (sheet, start, stop) partitions, in input order.
+
+    Excel files are split by sheet only, CSV files into byte ranges of about
+    partition_rows rows starting at line boundaries (a single partition when the file
+    uses quoting) and Parquet files by row group (start is the row group index).
+
+    Parameters:
+        sheets: None for the first sheet (what process_file reads), 'all', or a list of names.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in CSV_EXTENSIONS:
+        return _csv_partitions(file_path, partition_rows)
+    if extension in PARQUET_EXTENSIONS:
+        return _parquet_partitions(file_path)
+    if extension in OPENPYXL_EXTENSIONS:
+        return _excel_partitions(file_path, sheets)
+    raise ValueError(f"Parallel processing does not support {extension or 'this'} files.")
+
+
+def iter_partition(file_path, sheet, start, stop):
+    """
+    Reads one partition from plan_partitions as DataFrames.
+
+    CSV and Parquet partitions are already bounded and come back as one DataFrame; a
+    worksheet is streamed in chunks of CHUNK_ROWS rows, like a serial upload.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in OPENPYXL_EXTENSIONS:
+        yield from iter_chunks(file_path, CHUNK_ROWS, sheet)
+        return
+    if extension in CSV_EXTENSIONS:
+        with open(file_path, 'rb') as f:
+            header = f.readline()
+            f.seek(start)
+            block = f.read(stop - start)
+        data = pd.read_csv(io.BytesIO(header + block))
+    elif extension in PARQUET_EXTENSIONS:
+        import pyarrow.parquet as pq
+        data = pq.ParquetFile(file_path).read_row_group(start).to_pandas()
+    else:
+        raise ValueError(f"Parallel processing does not support {extension or 'this'} files.")
+    data.columns = normalize_columns(data.columns)
+    yield data
+
+
+def _process_partition(task):
+    # Returns (ResultTable or None, errors, rows); error rows are relative to the partition.
+    # Once a chunk has invalid rows the rest is only validated, not computed
+    file_path, sheet, start, stop = task
+    tables = []
+    errors = []
+    rows = 0
+    for data in iter_partition(file_path, sheet, start, stop):
+        errors.extend(validate_upload(data, rows + 1))
+        if not errors:
+            tables.append(compute_result_table(data))
+        rows += len(data)
+    if errors:
+        return None, errors, rows
+    return ResultTable.concat(tables), [], rows
+
+
+def _merge_partitions(parts):
+    tables = []
+    errors = []
+    offset = 0
+    for results, part_errors, rows in parts:
+        if results is not None:
+            tables.append(results)
+        errors.extend(dict(error, row=error['row'] + offset) for error in part_errors)
+        offset += rows
+    if errors:
+        raise ValidationError(errors)
+    return ResultTable.concat(tables)
+
+
+def process_file_parallel(file_path, workers=None, sheets=None, partition_rows=PARTITION_ROWS):
+    """
+    Computes recommendations for an upload across a process pool.
+
+    CSV and Parquet files are split by rows. Excel files are split by sheet only, so
+    they run in parallel only when sheets names more than one; each sheet is still
+    streamed in chunks. Partitions are processed concurrently and merged back in input
+    order (sheet order, then row order), so the output matches process_file for the
+    same rows.
+
+    Parameters:
+        file_path (str): Excel (.xlsx), CSV or Parquet file.
+        workers (int): Worker processes; defaults to os.cpu_count().
+        sheets: None for the first sheet, 'all', or a list of sheet names.
+        partition_rows (int): Approximate rows per CSV partition.
+
+    Returns:
+        ResultTable: Recommendations in input order.
+
+    Raises:
+        ValidationError: Listing the invalid rows of every partition.
+    """
+    tasks = [(file_path,) + partition for partition in plan_partitions(file_path, sheets, partition_rows)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        return _merge_partitions(map(_process_partition, tasks))
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+        return _merge_partitions(pool.map(_process_partition, tasks))
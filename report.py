@@ -0,0 +1,149 @@
+from fpdf import FPDF
+
+from results import RESULT_COLUMNS, iter_result_batches
+
+HEADERS = list(RESULT_COLUMNS)
+
+TITLE = 'Separator Calculation Results'
+FONT_SIZE = 8
+LINE_HEIGHT = 5  # Height of one wrapped text line in mm
+MIN_ROW_HEIGHT = 10
+REASON_COL_WIDTH = 56  # Wider width for the 'Reason' column
+
+
+class ResultsPDF(FPDF):
+    def __init__(self, orientation='L', unit='mm', format='A3'):
+        super().__init__(orientation, unit, format)
+
+    def header(self):
+        self.set_font('Arial', 'B', 12)
+        self.cell(0, 10, TITLE, align='C', ln=True)
+        self.ln(10)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('Arial', 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', align='C')
+
+
+def format_row(result):
+    return [
+        result['Separator Type'],
+        result['Reason'],
+        str(result['Oil Flow (BOPD)']), str(result['Water Flow (BWPD)']),
+        str(result['Gas Flow (MMscfd)']), str(result['Sand Content (%)']),
+        str(result['Separated Oil (BOPD)']),
+        str(result['Separated Water (BWPD)']), str(result['Separated Gas (MMscfd)']),
+        f"{result['Flash Oil Fraction (%)']:.5f}",
+        f"{result['Flash Water Fraction (%)']:.5f}",
+        f"{result['Flash Gas Fraction (%)']:.5f}"
+    ]
+
+
+class TableWriter:
+    """
+    Writes a bordered table to an FPDF document one row at a time.
+
+    Each row is emitted as a single block of PDF drawing operators instead of one
+    cell()/multi_cell() call per value; text that does not fit its column is wrapped
+    and the row grows to the tallest cell. Rows never split across pages and the header
+    row is repeated on every page.
+    """
+
+    def __init__(self, pdf, headers, widths):
+        self.pdf = pdf
+        self.headers = headers
+        self.widths = widths
+        self._char_widths = None
+        self._wrapped = {}
+
+    def _text_width(self, text):
+        return sum(self._char_widths.get(char, 0) for char in text) * self.pdf.font_size / 1000.0
+
+    def _wrap(self, text, width):
+        key = (text, width)
+        lines = self._wrapped.get(key)
+        if lines is not None:
+            return lines
+
+        available = width - 2 * self.pdf.c_margin
+        lines = []
+        current = ''
+        for word in text.split(' '):
+            candidate = f"{current} {word}" if current else word
+            if current and self._text_width(candidate) > available:
+                lines.append(current)
+                current = word
+            else:
+                current = candidate
+        lines.append(current)
+
+        # Reasons and headers repeat on many rows; numbers are unique, so only short-lived
+        if len(self._wrapped) < 10000:
+            self._wrapped[key] = lines
+        return lines
+
+    def _set_font(self):
+        self.pdf.set_font('Arial', '', FONT_SIZE)
+        self._char_widths = self.pdf.current_font['cw']
+
+    def start(self):
+        self.pdf.add_page()
+        self._set_font()
+        self.row(self.headers, repeat_header=False)
+
+    def row(self, values, repeat_header=True):
+        pdf = self.pdf
+        k = pdf.k
+        cells = [self._wrap(str(value), width) for value, width in zip(values, self.widths)]
+        height = max(MIN_ROW_HEIGHT, LINE_HEIGHT * max(len(lines) for lines in cells))
+
+        if pdf.y + height > pdf.page_break_trigger:
+            pdf.add_page()
+            self._set_font()
+            if repeat_header:
+                self.row(self.headers, repeat_header=False)
+
+        x = pdf.l_margin
+        y = pdf.y
+        ops = []
+        for lines, width in zip(cells, self.widths):
+            ops.append('%.2f %.2f %.2f %.2f re S' % (x * k, (pdf.h - y) * k, width * k, -height * k))
+            top = y + (height - LINE_HEIGHT * len(lines)) / 2.0
+            for index, line in enumerate(lines):
+                if not line:
+                    continue
+                dx = (width - self._text_width(line)) / 2.0
+                baseline = top + (index + 0.5) * LINE_HEIGHT + 0.3 * pdf.font_size
+                ops.append('BT %.2f %.2f Td (%s) Tj ET' % ((x + dx) * k, (pdf.h - baseline) * k, pdf._escape(line)))
+            x += width
+        pdf._out(' '.join(ops))
+        pdf.y = y + height
+        pdf.x = pdf.l_margin
+
+
+def build_results_pdf(results):
+    """
+    Renders recommendation records as an A3 landscape PDF table.
+
+    Parameters:
+        results (ResultTable): Recommendations as returned by process_file; a list of
+            recommendation dicts also works.
+
+    Returns:
+        bytes: The PDF document.
+    """
+    pdf = ResultsPDF('L')  # 'L' for landscape orientation
+    available = pdf.w - pdf.l_margin - pdf.r_margin
+    col_width = (available - REASON_COL_WIDTH) / (len(HEADERS) - 1)
+    widths = [col_width] * len(HEADERS)
+    widths[1] = REASON_COL_WIDTH
+
+    table = TableWriter(pdf, HEADERS, widths)
+    table.start()
+    for batch in iter_result_batches(results, 10000):
+        for result in batch.to_records():
+            table.row(format_row(result))
+
+    # FPDF 1.7 builds the document as a latin-1 str
+    return pdf.output(dest='S').encode('latin-1')
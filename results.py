@@ -0,0 +1,228 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+# Result columns in display order; the first two hold text, the rest numbers
+CATEGORY_COLUMNS = ("Separator Type", "Reason")
+NUMERIC_COLUMNS = (
+    "Oil Flow (BOPD)", "Water Flow (BWPD)", "Gas Flow (MMscfd)", "Sand Content (%)",
+    "Separated Oil (BOPD)", "Separated Water (BWPD)", "Separated Gas (MMscfd)",
+    "Flash Oil Fraction (%)", "Flash Water Fraction (%)", "Flash Gas Fraction (%)",
+)
+RESULT_COLUMNS = CATEGORY_COLUMNS + NUMERIC_COLUMNS
+
+
+def _code_dtype(categories):
+    return np.min_scalar_type(max(len(categories) - 1, 0))
+
+
+def _categorical(labels, codes):
+    # Deduplicated labels and codes into them, in the smallest unsigned integer type
+    labels = np.asarray(labels, dtype=object)
+    if not len(labels):
+        return [], np.zeros(len(codes), dtype=np.uint8)
+    unique, inverse = np.unique(labels, return_inverse=True)
+    return unique.tolist(), inverse[codes].astype(_code_dtype(unique))
+
+
+def _encode(values):
+    labels = {}
+    codes = [labels.setdefault(value, len(labels)) for value in values]
+    return list(labels), np.array(codes, dtype=_code_dtype(labels))
+
+
+def _numeric(values):
+    # Input columns keep an integer dtype so whole numbers display as they were uploaded
+    array = np.asarray(values)
+    if array.dtype.kind not in 'iuf':
+        array = array.astype(float)
+    return array
+
+
+class ResultRow(Mapping):
+    """Read-only view of one ResultTable row, indexed by header like a recommendation dict."""
+
+    __slots__ = ('_table', '_index')
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, header):
+        table = self._table
+        if header in table.codes:
+            return table.categories[header][table.codes[header][self._index]]
+        if header in table.columns:
+            return table.columns[header][self._index].item()
+        raise KeyError(header)
+
+    def __iter__(self):
+        return iter(RESULT_COLUMNS)
+
+    def __len__(self):
+        return len(RESULT_COLUMNS)
+
+    def __repr__(self):
+        return f"ResultRow({dict(self)!r})"
+
+
+class ResultTable:
+    """
+    Recommendation results stored column-wise.
+
+    Numeric columns are typed arrays; Separator Type and Reason are integer codes into a
+    short list of labels, since a rule table only produces a handful of each. Indexing a
+    table gives a ResultRow view, slicing it gives a table sharing the same arrays, and
+    iterating it yields rows, so templates and JSON routes read it like a list of
+    recommendation dicts. Exporters read the arrays directly (see export.py).
+
+    Parameters:
+        columns (dict): Array per numeric header.
+        codes (dict): Code array per categorical header.
+        categories (dict): Label list per categorical header, indexed by its codes.
+    """
+
+    def __init__(self, columns, codes, categories):
+        self.columns = columns
+        self.codes = codes
+        self.categories = categories
+
+    @classmethod
+    def from_codes(cls, columns, categorical):
+        """
+        Builds a table from numeric columns and (labels, codes) per categorical header,
+        e.g. a rule table's types and the index of the matched rule.
+        """
+        codes = {}
+        categories = {}
+        for header in CATEGORY_COLUMNS:
+            categories[header], codes[header] = _categorical(*categorical[header])
+        return cls({header: _numeric(columns[header]) for header in NUMERIC_COLUMNS}, codes, categories)
+
+    @classmethod
+    def from_records(cls, records):
+        """Builds a table from recommendation dicts, e.g. compute_recommendations output."""
+        records = list(records)
+        codes = {}
+        categories = {}
+        for header in CATEGORY_COLUMNS:
+            categories[header], codes[header] = _encode([record[header] for record in records])
+        columns = {header: _numeric([record[header] for record in records]) for header in NUMERIC_COLUMNS}
+        return cls(columns, codes, categories)
+
+    @classmethod
+    def concat(cls, tables):
+        """Stacks tables in order, merging their category labels."""
+        tables = list(tables)
+        if not tables:
+            return cls.from_records([])
+        if len(tables) == 1:
+            return tables[0]
+        columns = {header: np.concatenate([table.columns[header] for table in tables]) for header in NUMERIC_COLUMNS}
+        codes = {}
+        categories = {}
+        for header in CATEGORY_COLUMNS:
+            labels = {}
+            remapped = []
+            for table in tables:
+                mapping = np.array([labels.setdefault(label, len(labels)) for label in table.categories[header]],
+                                   dtype=np.int64)
+                remapped.append(mapping[table.codes[header]])
+            categories[header] = list(labels)
+            codes[header] = np.concatenate(remapped).astype(_code_dtype(labels))
+        return cls(columns, codes, categories)
+
+    def __len__(self):
+        return len(self.codes[CATEGORY_COLUMNS[0]])
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return ResultTable({header: column[key] for header, column in self.columns.items()},
+                               {header: codes[key] for header, codes in self.codes.items()}, self.categories)
+        if isinstance(key, str):
+            return self.column(key)
+        index = range(len(self))[key]
+        return ResultRow(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield ResultRow(self, index)
+
+    def __repr__(self):
+        return f"<ResultTable {len(self)} rows, {self.nbytes} bytes>"
+
+    @property
+    def nbytes(self):
+        """Bytes held by the arrays, not counting the category labels."""
+        return (sum(column.nbytes for column in self.columns.values())
+                + sum(codes.nbytes for codes in self.codes.values()))
+
+    def column(self, header):
+        """All values of one column as an array; categorical columns are decoded to labels."""
+        if header in self.codes:
+            return np.array(self.categories[header], dtype=object)[self.codes[header]]
+        return self.columns[header]
+
+    def take(self, indices):
+        """Rows at indices, in that order, as a new table."""
+        return ResultTable({header: column[indices] for header, column in self.columns.items()},
+                           {header: codes[indices] for header, codes in self.codes.items()}, self.categories)
+
+    def to_lists(self, headers=RESULT_COLUMNS):
+        """One list of Python values per header, in order."""
+        lists = []
+        for header in headers:
+            if header in self.codes:
+                labels = self.categories[header]
+                lists.append([labels[code] for code in self.codes[header].tolist()])
+            else:
+                lists.append(self.columns[header].tolist())
+        return lists
+
+    def to_records(self):
+        """The rows as recommendation dicts."""
+        return [dict(zip(RESULT_COLUMNS, row)) for row in zip(*self.to_lists())]
+
+    def to_arrays(self):
+        """Flat dict of plain arrays (no Python objects), e.g. for np.savez; see from_arrays."""
+        arrays = {f"columns/{header}": column for header, column in self.columns.items()}
+        for header in CATEGORY_COLUMNS:
+            arrays[f"codes/{header}"] = self.codes[header]
+            arrays[f"categories/{header}"] = np.array(self.categories[header], dtype=str)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuilds a table from to_arrays output."""
+        return cls({header: arrays[f"columns/{header}"] for header in NUMERIC_COLUMNS},
+                   {header: arrays[f"codes/{header}"] for header in CATEGORY_COLUMNS},
+                   {header: arrays[f"categories/{header}"].tolist() for header in CATEGORY_COLUMNS})
+
+    def iter_batches(self, batch_rows):
+        """Yields consecutive slices of at most batch_rows rows."""
+        for start in range(0, len(self), batch_rows):
+            yield self[start:start + batch_rows]
+
+    def iter_records(self, batch_rows=10000):
+        """Yields the rows as recommendation dicts, converting batch_rows at a time."""
+        for batch in self.iter_batches(batch_rows):
+            yield from batch.to_records()
+
+
+def as_result_table(results):
+    """
+    results as a ResultTable; lists of recommendation dicts are converted and results
+    read lazily from a store (store.StoredResults) are loaded.
+    """
+    if isinstance(results, ResultTable):
+        return results
+    if hasattr(results, 'to_table'):
+        return results.to_table()
+    return ResultTable.from_records(results)
+
+
+def iter_result_batches(results, batch_rows):
+    """Consecutive ResultTables of at most batch_rows rows, without loading stored results whole."""
+    if hasattr(results, 'iter_batches'):
+        return results.iter_batches(batch_rows)
+    return as_result_table(results).iter_batches(batch_rows)
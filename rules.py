@@ -0,0 +1,195 @@
+import hashlib
+import json
+import operator
+import os
+import re
+import threading
+
+import numpy as np
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'rules.json')
+
+OPERATORS = {
+    '>': operator.gt,
+    '>=': operator.ge,
+    '<': operator.lt,
+    '<=': operator.le,
+    '==': operator.eq,
+    '!=': operator.ne,
+    'in': lambda column, values: np.isin(column, values),
+    'not in': lambda column, values: ~np.isin(column, values),
+}
+
+
+def _compile_condition(condition):
+    try:
+        column, op, value = condition['column'], condition['op'], condition['value']
+    except (KeyError, TypeError):
+        raise ValueError(f"Rule conditions need 'column', 'op' and 'value': {condition!r}")
+    if op not in OPERATORS:
+        raise ValueError(f"Unknown rule operator {op!r}; expected one of {', '.join(OPERATORS)}")
+    if op in ('in', 'not in'):
+        if not isinstance(value, list) or not value:
+            raise ValueError(f"Operator {op!r} needs a non-empty list value: {condition!r}")
+        values = value
+    else:
+        values = [value]
+    textual = all(isinstance(v, str) for v in values)
+    if not textual and not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+        raise ValueError(f"Rule values must be all numbers or all strings: {condition!r}")
+    return column, OPERATORS[op], value, textual
+
+
+class RuleTable:
+    """
+    Separator selection rules compiled from a declarative table.
+
+    Each rule has a name, a separator type, a reason and conditions combined with "all"
+    (and) or "any" (or). Rules are checked in order and the first match wins; rows no rule
+    matches get the table's default. Conditions compare a column against a number or a
+    string, so numeric columns are converted to float arrays once per evaluation.
+
+    Parameters:
+        spec (dict): {"default": {"type", "reason"}, "rules": [{"name", "all"|"any", "type", "reason"}]}.
+    """
+
+    def __init__(self, spec):
+        try:
+            default = spec['default']
+            rules = spec['rules']
+            self.default_type = str(default['type'])
+            self.default_reason = str(default['reason'])
+        except (KeyError, TypeError):
+            raise ValueError("A rule table needs a 'default' with 'type' and 'reason', and a 'rules' list.")
+
+        self.names = []
+        self._rules = []
+        kinds = {}
+        for index, rule in enumerate(rules):
+            name = str(rule.get('name') or f"rule_{index + 1}")
+            if not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', name):
+                raise ValueError(f"Rule name {name!r} must be an identifier (letters, digits, underscores)")
+            if name in self.names or name == 'default':
+                raise ValueError(f"Duplicate rule name {name!r}")
+            if ('all' in rule) == ('any' in rule):
+                raise ValueError(f"Rule {name!r} needs exactly one of 'all' or 'any'")
+            if 'type' not in rule or 'reason' not in rule:
+                raise ValueError(f"Rule {name!r} needs a 'type' and a 'reason'")
+            combine = 'all' if 'all' in rule else 'any'
+            conditions = [_compile_condition(condition) for condition in rule[combine]]
+            if not conditions:
+                raise ValueError(f"Rule {name!r} has no conditions")
+            for column, _, _, textual in conditions:
+                if kinds.setdefault(column, textual) != textual:
+                    raise ValueError(f"Column {column!r} is compared against both numbers and strings")
+            self.names.append(name)
+            self._rules.append((combine, conditions))
+
+        # Columns in first-use order, flagged True when compared as text
+        self.columns = kinds
+        # Lookup tables indexed by the matched rule; the default sits after the last rule
+        self.types = np.array([rule['type'] for rule in rules] + [self.default_type], dtype=object)
+        self.reasons = np.array([rule['reason'] for rule in rules] + [self.default_reason], dtype=object)
+        self.fingerprint = hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+        self._hits = np.zeros(len(self._rules) + 1, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rules)
+
+    def _arrays(self, data):
+        arrays = {}
+        for column, textual in self.columns.items():
+            if textual:
+                arrays[column] = data[column].to_numpy(dtype=object)
+            else:
+                arrays[column] = data[column].to_numpy(dtype=float, na_value=np.nan)
+        return arrays
+
+    def masks(self, data):
+        """One boolean array per rule, in table order."""
+        arrays = self._arrays(data)
+        masks = []
+        for combine, conditions in self._rules:
+            with np.errstate(invalid='ignore'):
+                parts = [np.asarray(compare(arrays[column], value), dtype=bool)
+                         for column, compare, value, _ in conditions]
+            reduce = np.logical_and if combine == 'all' else np.logical_or
+            masks.append(reduce.reduce(parts) if len(parts) > 1 else parts[0])
+        return masks
+
+    def match(self, data, hits=None):
+        """
+        Index of the first matching rule for every row; len(self) where none matches.
+
+        Hit counts for the evaluated rows are added to the table's counters, or to hits
+        (from new_hits) when given, so a caller can record them later with record_hits.
+        """
+        masks = self.masks(data)
+        if not masks:
+            index = np.full(len(data), len(self._rules))
+        else:
+            index = np.select(masks, np.arange(len(self._rules)), default=len(self._rules))
+        counts = np.bincount(index, minlength=len(self._rules) + 1)
+        if hits is not None:
+            hits += counts
+            return index
+        with self._lock:
+            self._hits += counts
+        return index
+
+    def select(self, data):
+        """
+        Picks the separator type and reason for every row.
+
+        Returns:
+            tuple: (separator_type, reason) object arrays.
+        """
+        index = self.match(data)
+        return self.types[index], self.reasons[index]
+
+    def new_hits(self):
+        """Zeroed hit counters for match(data, hits=...)."""
+        return np.zeros(len(self._rules) + 1, dtype=np.int64)
+
+    def record_hits(self, hits):
+        """Adds counters from new_hits to the table's hit counts."""
+        with self._lock:
+            self._hits += hits
+
+    def hit_counts(self):
+        """Rows matched per rule name since the last reset, with unmatched rows under 'default'."""
+        with self._lock:
+            counts = self._hits.tolist()
+        return dict(zip(self.names + ['default'], counts))
+
+    def reset_hits(self):
+        with self._lock:
+            self._hits[:] = 0
+
+
+def load_rule_table(path=DEFAULT_RULES_PATH):
+    """
+    Loads and compiles a rule table from a JSON or YAML file (.yml/.yaml, needs PyYAML).
+
+    Raises:
+        ValueError: If the file cannot be parsed or the table is malformed.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8') as f:
+        if extension in ('.yml', '.yaml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("YAML rule tables require the PyYAML package.")
+            try:
+                spec = yaml.safe_load(f)
+            except yaml.YAMLError as e:
+                raise ValueError(f"Invalid rule table {path}: {e}")
+        else:
+            try:
+                spec = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid rule table {path}: {e}")
+    return RuleTable(spec)
@@ -0,0 +1,234 @@
+import numpy as np
+
+from drag import DRAG_ITERATIONS, DRAG_TOLERANCE, solve_drag
+from fluids import gas_z_factor
+
+# Droplet diameters in microns
+LIQUID_DROPLET_MICRONS = 100
+WATER_DROPLET_MICRONS = 500
+OIL_DROPLET_MICRONS = 200
+
+# Horizontal candidate diameters: first one at dLeff / 2, then stepped by 15 in
+HORIZONTAL_CANDIDATES = 9
+HORIZONTAL_STEP = 15
+
+INPUTS = ('Qg', 'Qo', 'Qw', 'Po', 'To', 'Sg', 'SG_o', 'SG_w', 'Z', 'mu', 'tr_o', 'tr_w', 'B')
+
+# Optional inputs of calculate_separator_batch, with their defaults
+DROPLET_DEFAULTS = {
+    'liquid_droplet': LIQUID_DROPLET_MICRONS,
+    'water_droplet': WATER_DROPLET_MICRONS,
+    'oil_droplet': OIL_DROPLET_MICRONS,
+}
+PARAMETERS = INPUTS + tuple(DROPLET_DEFAULTS)
+
+# /calc form field names accepted in place of the parameter names
+FORM_ALIASES = {'P': 'Po', 'T': 'To', 'M': 'mu'}
+
+
+def fluid_densities(Po, T, Sg, SG_o, Z):
+    """
+    Liquid and gas densities in lb/ft³.
+
+    Parameters:
+        Po: Operating pressure in psia.
+        T: Operating temperature in °R.
+        Sg: Specific gravity of gas.
+        SG_o: Specific gravity of oil.
+        Z: Gas compressibility factor.
+
+    Returns:
+        tuple: (liquid_density_pl, gas_density_pg)
+    """
+    liquid_density_pl = 62.4 * (141.5 / (131.5 + SG_o))
+    gas_density_pg = (2.7 * Sg * Po) / (T * Z)
+    return liquid_density_pl, gas_density_pg
+
+
+def vertical_dimensions(Qg, Qo, Qw, Po, T, Z, mu, tr_o_sec, tr_w_sec, liquid_density_pl, gas_density_pg, dSG,
+                        liquid_droplet=LIQUID_DROPLET_MICRONS, oil_droplet=OIL_DROPLET_MICRONS,
+                        water_droplet=WATER_DROPLET_MICRONS):
+    """
+    Vertical separator diameter, height, seam-to-seam length and slenderness ratio.
+    Droplet diameters are in microns.
+
+    Returns:
+        tuple: (D, H, Lss, SR) arrays.
+    """
+    D_l = 5040 * (T * Z * Qg / Po) * ((gas_density_pg / (liquid_density_pl - gas_density_pg))
+                                      * (0.25 / liquid_droplet))
+    D_o = 6690 * (Qo * mu) / (dSG * (oil_droplet ** 2))
+    D_w = 6690 * (Qo * mu) / (dSG * (water_droplet ** 2))
+    D = np.maximum(np.maximum(np.where(D_l > 0, D_l, 0.0), np.where(D_o > 0, D_o, 0.0)), np.where(D_w > 0, D_w, 0.0))
+    H = (tr_o_sec * Qo + tr_w_sec * Qw) / (0.12 * D ** 2)  # Height for retention
+    Lss = np.where(D <= 36, (H + 76) / 12, (H + D + 40) / 12)
+    SR = (12 * Lss) / D  # Slenderness Ratio
+    return D, H, Lss, SR
+
+
+def horizontal_dimensions(Qg, Qo, Qw, Po, T, Z, mu, B, tr_o_sec, tr_w_sec, liquid_density_pl, gas_density_pg,
+                          Cd, dSG, liquid_droplet=LIQUID_DROPLET_MICRONS, water_droplet=WATER_DROPLET_MICRONS,
+                          candidates=True):
+    """
+    Horizontal separator oil pad diameter, dLeff constraints and candidate diameter table.
+    Droplet diameters are in microns.
+
+    Returns:
+        dict: diameter, dLeff_gas, dLeff_retention shaped like the inputs and, when
+        candidates is true, d, Leff, Lss_liquid, SR_liquid with an extra trailing axis of
+        HORIZONTAL_CANDIDATES.
+    """
+    H = (1.28 * (10 ** (-3)) * (tr_o_sec * dSG * (water_droplet ** 2))) / mu  # Max oil pad thickness
+    D = H / B
+
+    # Calculate dLeff based on gas capacity constraint
+    dLeff = 420 * (T * Z * Qg / Po) * (((gas_density_pg / (liquid_density_pl - gas_density_pg))
+                                        * (Cd / liquid_droplet)) ** 0.5)
+
+    # Calculate dLeff based on oil and water retention time constraints
+    d2Leff_retention = 1.42 * (Qw * tr_w_sec + Qo * tr_o_sec)
+    dLeff_retention = (d2Leff_retention ** 0.5) / 12
+
+    results = {
+        "diameter": D,
+        "dLeff_gas": dLeff,
+        "dLeff_retention": dLeff_retention,
+    }
+    if not candidates:
+        return results
+
+    steps = HORIZONTAL_STEP * np.arange(HORIZONTAL_CANDIDATES)
+    d = (dLeff / 2)[..., np.newaxis] + steps
+    Leff = d2Leff_retention[..., np.newaxis] / (d / 2)
+    Lss_liquid = 4 / 3 * Leff
+    SR_liquid = (12 * Lss_liquid) / d
+
+    results.update(d=d, Leff=Leff, Lss_liquid=Lss_liquid, SR_liquid=SR_liquid)
+    return results
+
+
+def calculate_separator_batch(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, separator_type,
+                              drag_tol=DRAG_TOLERANCE, drag_max_iter=DRAG_ITERATIONS, drag_method="fixed",
+                              liquid_droplet=LIQUID_DROPLET_MICRONS, water_droplet=WATER_DROPLET_MICRONS,
+                              oil_droplet=OIL_DROPLET_MICRONS, candidates=True):
+    """
+    Sizes many separators at once.
+
+    Every input accepts a scalar or an array-like (list, ndarray, DataFrame column); inputs
+    are broadcast against each other, so a single value can be shared by all cases. Inputs
+    are not expanded up front: intermediate results keep the shape of the inputs they
+    depend on, so grids built from orthogonal axes (see sweep) only pay for the full
+    shape in the final steps.
+
+    Parameters:
+        Same as a.calculate_separator, element-wise. separator_type may be a single
+        'Vertical'/'Horizontal' string or one per case. Z may be None to estimate it from
+        Po, To and Sg (see fluids.gas_z_factor).
+        drag_tol, drag_max_iter, drag_method: Passed to drag.solve_drag.
+        liquid_droplet, water_droplet, oil_droplet: Design droplet diameters in microns,
+            scalars or per-case arrays like the other inputs.
+        candidates (bool): Build the horizontal candidate table; False leaves out d, Leff,
+            Lss_liquid and SR_liquid.
+
+    Returns:
+        dict: Arrays keyed like the /calc results. Vertical-only outputs (height, length,
+        slenderness_ratio) are NaN for horizontal cases and the horizontal tables (d, Leff,
+        Lss_liquid, SR_liquid, one column per candidate diameter) are NaN for vertical ones.
+        drag_iterations, drag_residual and drag_converged report the Cd solve per case.
+    """
+    if Z is None:
+        Z = gas_z_factor(Po, To, Sg)
+    values = [np.asarray(v, dtype=float) for v in (Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B,
+                                                     liquid_droplet, water_droplet, oil_droplet)]
+    (Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B,
+     liquid_droplet, water_droplet, oil_droplet) = values
+    shape = np.broadcast_shapes(*(v.shape for v in values), np.shape(separator_type)) or (1,)
+
+    # Lower-case the distinct labels only; per-case string arrays are slow to transform
+    types = np.asarray(separator_type, dtype=str)
+    labels, inverse = np.unique(types, return_inverse=True)
+    kind = np.broadcast_to(np.char.lower(labels)[inverse].reshape(types.shape), shape)
+    vertical = kind == "vertical"
+    horizontal = kind == "horizontal"
+    if not np.all(vertical | horizontal):
+        raise ValueError("Invalid separator type")
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        # Convert temperature to Rankine and retention times to seconds
+        T = To + 459.67
+        tr_o_sec = tr_o * 60
+        tr_w_sec = tr_w * 60
+
+        liquid_density_pl, gas_density_pg = fluid_densities(Po, T, Sg, SG_o, Z)
+        drag = solve_drag(liquid_density_pl, gas_density_pg, mu, liquid_droplet,
+                          tol=drag_tol, max_iter=drag_max_iter, method=drag_method)
+        Vt, Re, Cd = drag.Vt, drag.Re, drag.Cd
+
+        # Gravity difference for oil-water separation
+        dSG = SG_w - (141.5 / (131.5 + SG_o))
+
+        # Skip the branch no case uses
+        D_v = H_v = Lss_v = SR_v = np.nan
+        if vertical.any():
+            D_v, H_v, Lss_v, SR_v = vertical_dimensions(Qg, Qo, Qw, Po, T, Z, mu, tr_o_sec, tr_w_sec,
+                                                        liquid_density_pl, gas_density_pg, dSG,
+                                                        liquid_droplet, oil_droplet, water_droplet)
+        horiz = dict.fromkeys(("diameter", "dLeff_gas", "dLeff_retention", "d", "Leff", "Lss_liquid", "SR_liquid"),
+                              np.nan)
+        if horizontal.any():
+            horiz.update(horizontal_dimensions(Qg, Qo, Qw, Po, T, Z, mu, B, tr_o_sec, tr_w_sec, liquid_density_pl,
+                                               gas_density_pg, Cd, dSG, liquid_droplet, water_droplet, candidates))
+
+    def full(value):
+        return np.array(np.broadcast_to(value, shape))
+
+    results = {
+        "separator_type": np.where(vertical, "Vertical", "Horizontal"),
+        "diameter": np.where(vertical, D_v, horiz["diameter"]),
+        "height": np.where(vertical, H_v, np.nan),
+        "length": np.where(vertical, Lss_v, np.nan),
+        "slenderness_ratio": np.where(vertical, SR_v, np.nan),
+        "liquid_density": full(liquid_density_pl),
+        "gas_density": full(gas_density_pg),
+        "settling_velocity": full(Vt),
+        "Reynolds_number": full(Re),
+        "drag_coefficient": full(Cd),
+        "drag_iterations": full(drag.iterations),
+        "drag_residual": full(drag.residual),
+        "drag_converged": full(drag.converged),
+        "dLeff_gas": np.where(horizontal, horiz["dLeff_gas"], np.nan),
+        "dLeff_retention": np.where(horizontal, horiz["dLeff_retention"], np.nan),
+    }
+    if candidates:
+        table = horizontal[..., np.newaxis]
+        for key in ("d", "Leff", "Lss_liquid", "SR_liquid"):
+            results[key] = np.where(table, horiz[key], np.nan) * np.ones(HORIZONTAL_CANDIDATES)
+    return results
+
+
+def size_separator(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, separator_type):
+    """
+    Sizes a single separator; this is the scalar entry point used by /calc and
+    a.calculate_separator.
+
+    Parameters:
+        Same as calculate_separator_batch, as plain floats.
+
+    Returns:
+        dict: Results keyed as rendered by calc.html.
+    """
+    if str(separator_type).lower() not in ("vertical", "horizontal"):
+        raise ValueError("Invalid separator type")
+
+    batch = calculate_separator_batch(Qg, Qo, Qw, Po, To, Sg, SG_o, SG_w, Z, mu, tr_o, tr_w, B, separator_type)
+    value = {key: array[0] for key, array in batch.items()}
+
+    if str(separator_type).lower() == "vertical":
+        keys = ("diameter", "height", "length", "slenderness_ratio", "liquid_density", "gas_density",
+                "settling_velocity", "Reynolds_number", "drag_coefficient")
+        return {key: round(float(value[key]), 2) for key in keys}
+
+    results = {key: round(float(value[key]), 2) for key in ("diameter", "dLeff_gas", "dLeff_retention")}
+    for key in ("Lss_liquid", "d", "Leff", "SR_liquid"):
+        results[key] = value[key].tolist()
+    return results
@@ -0,0 +1,260 @@
+import io
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+from results import ResultTable, as_result_table
+
+# Rows per stored chunk of SQLiteResultStore; a results page reads one or two chunks
+STORE_CHUNK_ROWS = 5000
+
+
+def new_job_id():
+    return uuid.uuid4().hex
+
+
+class ResultsExpired(LookupError):
+    """A stored job was evicted while its results were being read."""
+
+
+def _pack_chunk(table):
+    buffer = io.BytesIO()
+    np.savez(buffer, **table.to_arrays())
+    return buffer.getvalue()
+
+
+def _unpack_chunk(data):
+    # Plain arrays only, so a stored chunk can never run code when read
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        return ResultTable.from_arrays({name: arrays[name] for name in arrays.files})
+
+
+class MemoryResultStore:
+    """
+    Keeps each job's results in this process, evicting the oldest jobs first.
+
+    Parameters:
+        max_jobs (int): Maximum number of stored jobs.
+        max_rows (int): Maximum total result rows across all jobs.
+        max_age (float): Seconds a job is kept; None keeps it until evicted by size.
+    """
+
+    def __init__(self, max_jobs=32, max_rows=2_000_000, max_age=3600):
+        self.max_jobs = max_jobs
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self._jobs = OrderedDict()
+        self._rows = 0
+        self._lock = threading.Lock()
+
+    def put(self, results, job_id=None):
+        """Stores results and returns their job ID."""
+        job_id = job_id or new_job_id()
+        with self._lock:
+            if job_id in self._jobs:
+                self._drop(job_id)
+            self._jobs[job_id] = (time.time(), results)
+            self._rows += len(results)
+            self._evict()
+        return job_id
+
+    def get(self, job_id):
+        """Returns the results for job_id, or None if unknown or evicted."""
+        with self._lock:
+            self._evict()
+            entry = self._jobs.get(job_id)
+            return entry[1] if entry is not None else None
+
+    def delete(self, job_id):
+        with self._lock:
+            if job_id in self._jobs:
+                self._drop(job_id)
+
+    def _drop(self, job_id):
+        _, results = self._jobs.pop(job_id)
+        self._rows -= len(results)
+
+    def _evict(self):
+        now = time.time()
+        # Keep at least the newest job even if it alone exceeds max_rows
+        while len(self._jobs) > 1 and (len(self._jobs) > self.max_jobs or self._rows > self.max_rows):
+            self._drop(next(iter(self._jobs)))
+        if self.max_age is not None:
+            for job_id, (created, _) in list(self._jobs.items()):
+                if now - created <= self.max_age:
+                    break
+                self._drop(job_id)
+
+    def __len__(self):
+        return len(self._jobs)
+
+
+class StoredResults:
+    """
+    One job's results in a SQLiteResultStore, read a chunk at a time on demand.
+
+    Behaves like the ResultTable it was stored from for len(), indexing, slicing and
+    iteration, but a slice only loads the chunks it overlaps, so a results page costs the
+    same for any job size and exports can stream the job chunk by chunk. Reads raise
+    ResultsExpired if the job is evicted before they finish, rather than returning part of
+    the results.
+    """
+
+    def __init__(self, store, job_id, rows, chunk_rows):
+        self.store = store
+        self.job_id = job_id
+        self.rows = rows
+        self.chunk_rows = chunk_rows
+
+    def __len__(self):
+        return self.rows
+
+    def _chunks(self, first, last):
+        with self.store._connect() as db:
+            rows = db.execute("SELECT data FROM result_arrays WHERE job_id = ? AND chunk BETWEEN ? AND ? "
+                              "ORDER BY chunk", (self.job_id, first, last)).fetchall()
+        if len(rows) != last - first + 1:
+            raise ResultsExpired(f"Results of job {self.job_id} are no longer stored.")
+        return [_unpack_chunk(row[0]) for row in rows]
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.rows)
+            if step != 1:
+                return self.to_table()[key]
+            if stop <= start:
+                return ResultTable.concat([])
+            first, last = start // self.chunk_rows, (stop - 1) // self.chunk_rows
+            offset = first * self.chunk_rows
+            return ResultTable.concat(self._chunks(first, last))[start - offset:stop - offset]
+        index = range(self.rows)[key]
+        return self[index:index + 1][0]
+
+    def __iter__(self):
+        for batch in self.iter_batches():
+            yield from batch
+
+    def iter_batches(self, batch_rows=None):
+        """Yields the results as consecutive ResultTables, loading one stored chunk at a time."""
+        chunks = -(-self.rows // self.chunk_rows)
+        for chunk in range(chunks):
+            table, = self._chunks(chunk, chunk)
+            yield from table.iter_batches(batch_rows or self.chunk_rows)
+
+    def iter_records(self, batch_rows=10000):
+        for batch in self.iter_batches(batch_rows):
+            yield from batch.to_records()
+
+    def to_table(self):
+        """All rows as one ResultTable."""
+        if not self.rows:
+            return ResultTable.concat([])
+        return ResultTable.concat(self._chunks(0, (self.rows - 1) // self.chunk_rows))
+
+
+class SQLiteResultStore:
+    """
+    Stores each job's results in a local SQLite file, so every worker process on the host
+    sees the same jobs. Results are split into chunks of chunk_rows rows, each stored as an
+    npz blob of ResultTable.to_arrays and loaded with allow_pickle=False, and get() returns
+    a StoredResults that reads only the chunks a page or export needs.
+
+    Parameters:
+        path (str): SQLite database file.
+        max_jobs (int): Maximum number of stored jobs.
+        max_bytes (int): Maximum total size of stored chunks.
+        max_age (float): Seconds a job is kept; None keeps it until evicted by size.
+        chunk_rows (int): Rows per stored chunk.
+    """
+
+    def __init__(self, path, max_jobs=256, max_bytes=1 << 30, max_age=3600, chunk_rows=STORE_CHUNK_ROWS):
+        self.path = path
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.chunk_rows = chunk_rows
+        with self._connect() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS result_jobs (job_id TEXT PRIMARY KEY, created REAL NOT NULL, "
+                       "size INTEGER NOT NULL, rows INTEGER NOT NULL, chunk_rows INTEGER NOT NULL)")
+            db.execute("CREATE TABLE IF NOT EXISTS result_arrays "
+                       "(job_id TEXT NOT NULL, chunk INTEGER NOT NULL, data BLOB NOT NULL, PRIMARY KEY (job_id, chunk))")
+            # Jobs stored as pickled chunks by older code are dropped
+            if db.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'result_chunks'").fetchone():
+                db.execute("DELETE FROM result_jobs")
+                db.execute("DROP TABLE result_chunks")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def put(self, results, job_id=None):
+        job_id = job_id or new_job_id()
+        results = as_result_table(results)
+        chunks = [_pack_chunk(batch) for batch in results.iter_batches(self.chunk_rows)]
+        with self._connect() as db:
+            self._delete(db, job_id)
+            db.execute("INSERT INTO result_jobs (job_id, created, size, rows, chunk_rows) VALUES (?, ?, ?, ?, ?)",
+                       (job_id, time.time(), sum(len(data) for data in chunks), len(results), self.chunk_rows))
+            db.executemany("INSERT INTO result_arrays (job_id, chunk, data) VALUES (?, ?, ?)",
+                           [(job_id, index, data) for index, data in enumerate(chunks)])
+            self._evict(db)
+        return job_id
+
+    def get(self, job_id):
+        with self._connect() as db:
+            if self.max_age is not None:
+                row = db.execute("SELECT rows, chunk_rows FROM result_jobs WHERE job_id = ? AND created >= ?",
+                                 (job_id, time.time() - self.max_age)).fetchone()
+            else:
+                row = db.execute("SELECT rows, chunk_rows FROM result_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return StoredResults(self, job_id, *row) if row is not None else None
+
+    def delete(self, job_id):
+        with self._connect() as db:
+            self._delete(db, job_id)
+
+    def _delete(self, db, job_ids):
+        if isinstance(job_ids, str):
+            job_ids = [job_ids]
+        params = [(job_id,) for job_id in job_ids]
+        db.executemany("DELETE FROM result_jobs WHERE job_id = ?", params)
+        db.executemany("DELETE FROM result_arrays WHERE job_id = ?", params)
+
+    def _evict(self, db):
+        if self.max_age is not None:
+            expired = db.execute("SELECT job_id FROM result_jobs WHERE created < ?",
+                                 (time.time() - self.max_age,)).fetchall()
+            self._delete(db, [job_id for job_id, in expired])
+        # Keep the newest max_jobs jobs, then drop the oldest until the newest fit in max_bytes
+        rows = db.execute("SELECT job_id, size FROM result_jobs ORDER BY created DESC").fetchall()
+        total = 0
+        for index, (job_id, size) in enumerate(rows):
+            total += size
+            if index >= self.max_jobs or (total > self.max_bytes and index > 0):
+                self._delete(db, [old for old, _ in rows[index:]])
+                break
+
+    def __len__(self):
+        with self._connect() as db:
+            return db.execute("SELECT COUNT(*) FROM result_jobs").fetchone()[0]
+
+
+def create_result_store(url):
+    """
+    Builds a result store from a URL: 'memory' or 'sqlite:///path/to/results.db'.
+    """
+    if not url or url == 'memory':
+        return MemoryResultStore()
+    if url.startswith('sqlite:///'):
+        return SQLiteResultStore(url[len('sqlite:///'):])
+    raise ValueError(f"Unsupported result store: {url}")
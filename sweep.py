@@ -0,0 +1,193 @@
+import base64
+import io
+import json
+import math
+
+import numpy as np
+
+from sizing import DROPLET_DEFAULTS, FORM_ALIASES, INPUTS, PARAMETERS, calculate_separator_batch
+
+OUTPUTS = {
+    'Vertical': ('diameter', 'height', 'length', 'slenderness_ratio'),
+    'Horizontal': ('diameter', 'dLeff_gas', 'dLeff_retention'),
+}
+# Per-case results of calculate_separator_batch that can be requested
+BATCH_OUTPUTS = ('diameter', 'height', 'length', 'slenderness_ratio', 'liquid_density', 'gas_density',
+                 'settling_velocity', 'Reynolds_number', 'drag_coefficient', 'dLeff_gas', 'dLeff_retention')
+# Minimum-volume horizontal design (see optimizer); much slower than the closed-form outputs
+OPTIMAL_OUTPUTS = {'optimal_diameter': 'diameter', 'optimal_length': 'length', 'optimal_volume': 'volume'}
+
+MAX_AXIS_POINTS = 10000
+
+
+def _number(name, value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number")
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be finite")
+    return value
+
+
+def axis_values(axis, base):
+    """
+    Grid values for one axis definition.
+
+    Parameters:
+        axis (dict): {'name', 'values': [...]}, {'name', 'start', 'stop', 'num'} or
+            {'name', 'span', 'num'} for num points within ±span (a fraction) of the operating point.
+        base (dict): Operating point, used by 'span' axes.
+    """
+    name = axis['name']
+    if 'values' in axis:
+        values = np.array([_number(name, v) for v in axis['values']])
+    else:
+        num = int(axis.get('num', 0))
+        if not 2 <= num <= MAX_AXIS_POINTS:
+            raise ValueError(f"{name}: num must be between 2 and {MAX_AXIS_POINTS}")
+        if 'span' in axis:
+            center, span = base[name], _number(name, axis['span'])
+            start, stop = center * (1 - span), center * (1 + span)
+        elif 'start' in axis and 'stop' in axis:
+            start, stop = _number(name, axis['start']), _number(name, axis['stop'])
+        else:
+            raise ValueError(f"{name}: give 'values', 'start'/'stop'/'num' or 'span'/'num'")
+        values = np.linspace(start, stop, num)
+    if not 1 <= len(values) <= MAX_AXIS_POINTS:
+        raise ValueError(f"{name}: an axis needs between 1 and {MAX_AXIS_POINTS} values")
+    return values
+
+
+def normalize_sweep(inputs, axes, separator_type, outputs=None):
+    """
+    Validates a sweep definition and returns it in canonical form, suitable for sweep_key.
+
+    Returns:
+        dict: base (operating point per name in PARAMETERS), axes as [(name, values)],
+        separator_type and outputs.
+    """
+    if not isinstance(inputs, dict) or not isinstance(axes, list) or not axes:
+        raise ValueError("A sweep needs an 'inputs' object and a non-empty 'axes' list.")
+    inputs = {FORM_ALIASES.get(name, name): value for name, value in inputs.items()}
+    unknown = [name for name in inputs if name not in PARAMETERS]
+    if unknown:
+        raise ValueError(f"Unknown inputs: {', '.join(unknown)}")
+    base = {name: _number(name, inputs[name]) for name in INPUTS if name in inputs}
+    base.update({name: _number(name, inputs.get(name, default)) for name, default in DROPLET_DEFAULTS.items()})
+
+    grid = []
+    for axis in axes:
+        if not isinstance(axis, dict) or 'name' not in axis:
+            raise ValueError("Each axis needs a 'name'.")
+        name = FORM_ALIASES.get(axis['name'], axis['name'])
+        if name not in PARAMETERS:
+            raise ValueError(f"Unknown axis {axis['name']}")
+        if name in (axis_name for axis_name, _ in grid):
+            raise ValueError(f"Axis {name} is given twice")
+        if 'span' in axis and name not in base:
+            raise ValueError(f"{name}: a 'span' axis needs an operating point in 'inputs'")
+        grid.append((name, axis_values(dict(axis, name=name), base)))
+    missing = [name for name in INPUTS if name not in base and name not in dict(grid)]
+    if missing:
+        raise ValueError(f"Missing inputs: {', '.join(missing)}")
+
+    kind = str(separator_type).capitalize()
+    if kind not in OUTPUTS:
+        raise ValueError("Invalid separator type")
+    outputs = list(outputs or OUTPUTS[kind])
+    unknown = [name for name in outputs if name not in BATCH_OUTPUTS and name not in OPTIMAL_OUTPUTS]
+    if unknown:
+        raise ValueError(f"Unknown outputs: {', '.join(unknown)}")
+    if kind != 'Horizontal' and any(name in OPTIMAL_OUTPUTS for name in outputs):
+        raise ValueError("Optimal design outputs only apply to horizontal separators")
+    return {'base': base, 'axes': grid, 'separator_type': kind, 'outputs': outputs}
+
+
+def sweep_key(sweep):
+    """Cache key for a normalized sweep definition."""
+    return json.dumps({'base': sweep['base'], 'axes': [(name, values.tolist()) for name, values in sweep['axes']],
+                       'separator_type': sweep['separator_type'], 'outputs': sweep['outputs']}, sort_keys=True)
+
+
+def grid_points(sweep):
+    return math.prod(len(values) for _, values in sweep['axes'])
+
+
+def evaluate_sweep(sweep):
+    """
+    Sizes every point of the grid spanned by the sweep axes.
+
+    Each axis becomes an array along its own dimension, so calculate_separator_batch
+    computes every intermediate only over the axes it depends on; e.g. densities for a
+    P × T × Qg sweep are evaluated on the P × T plane and only broadcast across Qg at the end.
+
+    Returns:
+        dict: separator_type, axes ({name: values}), shape and outputs ({name: array of
+        that shape}, C order: the last axis varies fastest).
+    """
+    params = dict(sweep['base'])
+    count = len(sweep['axes'])
+    for dimension, (name, values) in enumerate(sweep['axes']):
+        shape = [1] * count
+        shape[dimension] = len(values)
+        params[name] = values.reshape(shape)
+    grid_shape = tuple(len(values) for _, values in sweep['axes'])
+
+    batch_outputs = [name for name in sweep['outputs'] if name in BATCH_OUTPUTS]
+    optimal_outputs = [name for name in sweep['outputs'] if name in OPTIMAL_OUTPUTS]
+    outputs = {}
+    if batch_outputs:
+        sized = calculate_separator_batch(**params, separator_type=sweep['separator_type'], candidates=False)
+        outputs.update({name: np.broadcast_to(sized[name], grid_shape) for name in batch_outputs})
+    if optimal_outputs:
+        from optimizer import optimize_horizontal
+
+        flat = {name: np.broadcast_to(params[name], grid_shape).ravel() for name in INPUTS}
+        design = optimize_horizontal(**flat)
+        outputs.update({name: design[OPTIMAL_OUTPUTS[name]].reshape(grid_shape) for name in optimal_outputs})
+
+    return {
+        'separator_type': sweep['separator_type'],
+        'axes': {name: values for name, values in sweep['axes']},
+        'shape': grid_shape,
+        'outputs': outputs,
+    }
+
+
+def sweep_json(result, encoding="list"):
+    """
+    JSON-ready form of an evaluate_sweep result with outputs flattened in C order.
+
+    encoding "list" gives plain number lists with NaN as null; "base64" gives each output
+    as little-endian float32 bytes in base64 ({"dtype", "data"}), several times smaller
+    and faster to produce for large grids (decode with Float32Array or np.frombuffer).
+    """
+    if encoding not in ("list", "base64"):
+        raise ValueError("encoding must be list or base64")
+
+    def flat(array):
+        if encoding == "base64":
+            data = np.ascontiguousarray(array, dtype='<f4').tobytes()
+            return {'dtype': 'float32', 'data': base64.b64encode(data).decode('ascii')}
+        values = np.asarray(array, dtype=float).ravel()
+        return np.where(np.isfinite(values), values, None).tolist()
+
+    return {
+        'separator_type': result['separator_type'],
+        'axes': {name: values.tolist() for name, values in result['axes'].items()},
+        'shape': list(result['shape']),
+        'outputs': {name: flat(array) for name, array in result['outputs'].items()},
+    }
+
+
+def sweep_npz(result):
+    """
+    evaluate_sweep result as an uncompressed .npz archive: axis_<name> value arrays and
+    one float32 array per output, already in grid shape.
+    """
+    arrays = {f"axis_{name}": values for name, values in result['axes'].items()}
+    arrays.update({name: np.asarray(array, dtype=np.float32) for name, array in result['outputs'].items()})
+    buffer = io.BytesIO()
+    np.savez(buffer, **arrays)
+    return buffer.getvalue()
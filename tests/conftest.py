@@ -0,0 +1,9 @@
+import pytest
+
+from synth import synthetic_cases
+
+
+@pytest.fixture
+def cases():
+    """Seeded random upload rows (see benchmarks/synth.py)."""
+    return synthetic_cases(1500)
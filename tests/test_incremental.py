@@ -0,0 +1,56 @@
+import pandas as pd
+
+from engine import compute_result_table
+from incremental import pack_revision, recompute_incremental, unpack_revision
+
+
+class CountingCompute:
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, data):
+        self.rows += len(data)
+        return compute_result_table(data)
+
+
+def test_unchanged_rows_are_reused(cases):
+    compute = CountingCompute()
+    _, revision, diff = recompute_incremental(cases, fingerprint='f', compute=compute)
+    assert compute.rows == len(cases)
+    assert (diff['added'], diff['recomputed'], diff['reused']) == (len(cases), len(cases), 0)
+
+    edited = cases.drop(index=[3]).reset_index(drop=True)
+    edited.loc[10, 'Gas Flow'] += 1
+    edited = pd.concat([edited, cases.iloc[[0]]], ignore_index=True)
+    compute = CountingCompute()
+    results, _, diff = recompute_incremental(edited, unpack_revision(pack_revision(revision)), fingerprint='f',
+                                             compute=compute)
+
+    # Row 10 changed; dropping row 3 shifts every later row, but their inputs are reused by content
+    assert compute.rows == diff['recomputed'] == 1
+    assert diff['reused'] == len(edited) - 1
+    assert results.to_records() == compute_result_table(edited).to_records()
+
+
+def test_keyed_diff_reports_added_changed_and_removed(cases):
+    cases['Well'] = [f"W{index}" for index in range(len(cases))]
+    _, revision, _ = recompute_incremental(cases, key_column='Well', fingerprint='f')
+
+    edited = cases.drop(index=[5]).reset_index(drop=True)
+    edited.loc[edited['Well'] == 'W7', 'Oil Flow'] += 100
+    edited = pd.concat([edited, pd.DataFrame([dict(cases.iloc[0], Well='NEW')])], ignore_index=True)
+    _, _, diff = recompute_incremental(edited, revision, key_column='Well', fingerprint='f')
+
+    assert (diff['added'], diff['changed'], diff['removed']) == (1, 1, 1)
+    assert diff['unchanged'] == len(cases) - 2
+    assert (diff['added_rows'], diff['changed_rows'], diff['removed_rows']) == (['NEW'], ['W7'], ['W5'])
+    # The added row has the same inputs as W0, so only the changed row is sized
+    assert diff['recomputed'] == 1
+
+
+def test_nothing_is_reused_under_another_fingerprint(cases):
+    _, revision, _ = recompute_incremental(cases, fingerprint='old rules')
+    compute = CountingCompute()
+    _, _, diff = recompute_incremental(cases, revision, fingerprint='new rules', compute=compute)
+    assert compute.rows == diff['recomputed'] == len(cases)
+    assert diff['unchanged'] == len(cases)
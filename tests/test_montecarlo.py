@@ -0,0 +1,44 @@
+import numpy as np
+
+from montecarlo import (HISTOGRAM_ACCURACY, PERCENTILES, StreamingHistogram, _check_distribution, run_monte_carlo,
+                        sample)
+from sizing import DROPLET_DEFAULTS, PARAMETERS, calculate_separator_batch
+
+INPUTS = {
+    'Qg': {'dist': 'lognormal', 'mean': 1.0, 'sigma': 1.5}, 'Qo': {'dist': 'lognormal', 'mean': 7, 'sigma': 1.5},
+    'Qw': 1000, 'Po': 1000, 'To': 100, 'Sg': 0.7, 'SG_o': 35, 'SG_w': 1.05, 'Z': 0.9, 'mu': 0.013,
+    'tr_o': 5, 'tr_w': 5, 'B': 0.5,
+}
+
+
+def assert_percentiles_close(reported, values):
+    exact = np.percentile(values, PERCENTILES)
+    assert np.all(np.abs(np.asarray(reported) - exact) <= 2 * HISTOGRAM_ACCURACY * np.abs(exact))
+
+
+def test_merged_histogram_percentiles_of_lognormal_input():
+    rng = np.random.default_rng(0)
+    batches = [rng.lognormal(3.0, 2.5, 50000) for _ in range(4)]
+    # A late outlier must not coarsen the resolution of the batches before it
+    batches.append(np.array([1e8]))
+    merged = StreamingHistogram()
+    for batch in batches:
+        histogram = StreamingHistogram()
+        histogram.add(batch)
+        merged.merge(histogram)
+    assert_percentiles_close([merged.percentile(q) for q in PERCENTILES], np.concatenate(batches))
+
+
+def test_monte_carlo_percentiles_of_heavy_tailed_output():
+    result = run_monte_carlo(INPUTS, 'Vertical', samples=20000, seed=1, workers=1, batch_samples=5000)
+    reported = [result['metrics']['slenderness_ratio'][f"P{q:g}"] for q in PERCENTILES]
+
+    # Draw the same samples again and size them in one piece for the exact percentiles
+    specs = {name: _check_distribution(name, INPUTS.get(name, DROPLET_DEFAULTS.get(name))) for name in PARAMETERS}
+    values = []
+    for seed in np.random.SeedSequence(1).spawn(4):
+        rng = np.random.default_rng(seed)
+        drawn = {name: sample(specs[name], rng, 5000) for name in PARAMETERS}
+        values.append(calculate_separator_batch(**drawn, separator_type='Vertical')['slenderness_ratio'])
+    values = np.concatenate(values)
+    assert_percentiles_close(reported, values[np.isfinite(values)])
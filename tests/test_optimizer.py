@@ -0,0 +1,15 @@
+import numpy as np
+
+from optimizer import optimize_horizontal
+from synth import synthetic_sizing_inputs
+
+
+def test_refinement_never_returns_a_worse_design():
+    inputs = synthetic_sizing_inputs(20000, seed=3)
+    inputs.pop('separator_type', None)
+    for objective in ('volume', 'weight'):
+        coarse = optimize_horizontal(**inputs, objective=objective, refine=0)
+        refined = optimize_horizontal(**inputs, objective=objective)
+        feasible = coarse['feasible']
+        assert np.array_equal(refined['feasible'], feasible)
+        assert np.all(refined[objective][feasible] <= coarse[objective][feasible])
@@ -0,0 +1,37 @@
+import pandas as pd
+
+from ingest import iter_recommendation_chunks
+from parallel import plan_partitions, process_file_parallel
+from results import ResultTable
+
+
+def serial_records(path):
+    return ResultTable.concat(iter_recommendation_chunks(path)).to_records()
+
+
+def test_csv_partitions_start_at_row_boundaries(tmp_path, cases):
+    path = tmp_path / 'cases.csv'
+    cases.to_csv(path, index=False)
+    partitions = plan_partitions(str(path), partition_rows=200)
+
+    assert len(partitions) > 1
+    with open(path, 'rb') as f:
+        data = f.read()
+    assert partitions[-1][2] == len(data)
+    for (_, start, stop), (_, next_start, _) in zip(partitions, partitions[1:]):
+        assert stop == next_start
+        assert data[start - 1:start] == b'\n'
+    assert process_file_parallel(str(path), workers=2, partition_rows=200).to_records() == serial_records(str(path))
+
+
+def test_csv_with_late_multiline_field_is_not_split(tmp_path, cases):
+    cases['Notes'] = ''
+    cases.loc[1200, 'Notes'] = 'first line\nsecond line'
+    path = tmp_path / 'cases.csv'
+    cases.to_csv(path, index=False)
+
+    assert plan_partitions(str(path), partition_rows=200) == [(None, len(','.join(cases.columns)) + 1,
+                                                                path.stat().st_size)]
+    results = process_file_parallel(str(path), workers=2, partition_rows=200)
+    assert len(results) == len(pd.read_csv(path)) == 1500
+    assert results.to_records() == serial_records(str(path))
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from engine import compute_result_table
+from rules import RuleTable
+from synth import synthetic_cases
+
+
+def reference_separator(row):
+    # The if/elif chain process_file used before the rule table (rules.json)
+    if row['Gas Flow'] > 15 or row['Water Flow'] > 8000:
+        return "Horizontal Separator", "Handles high gas and water flow efficiently due to a larger settling area."
+    elif row['Sand Content'] > 5:
+        return "Vertical Separator", "Recommended for high sand content to minimize clogging."
+    elif row['Gas Flow'] > 10 and row['Water Flow'] > 5000 and row['Sand Content'] < 5:
+        return "Horizontal Separator", "High gas, water, and sand content; suitable for managing multiphase flows."
+    elif row['Gas Specific Gravity'] > 0.8:
+        return ("Horizontal Separator",
+                "Better suited for gases with higher specific gravity, offering sufficient retention time.")
+    elif row['Field Type'] == "Offshore" and row['Oil Flow'] > 1000:
+        return ("Vertical Separator",
+                "Compact design suitable for installations with high oil flow, where space is limited.")
+    elif row['Oil API Gravity'] < 25 and row['Water Flow'] > 4000:
+        return "Horizontal Separator", "Heavy oil and significant water flow require efficient separation."
+    elif row['Gas Flow'] > 20 and row['Oil Flow'] < 500:
+        return "Horizontal Separator", "High gas-to-oil ratio; better suited for gas-dominant conditions."
+    elif row['Gas Flow'] < 5 and row['Water Flow'] < 3000:
+        return "Vertical Separator", "Suitable for low GOR."
+    elif row['Oil API Gravity'] > 40:
+        return "Vertical Separator", "Optimal for light oil with high API gravity."
+    return "Vertical Separator", "Default choice for general conditions."
+
+
+def boundary_cases(rows, seed=1):
+    # Values on and next to every threshold of the chain, so strict comparisons are exercised
+    rng = np.random.default_rng(seed)
+    data = synthetic_cases(rows, seed)
+    thresholds = {
+        'Gas Flow': (3, 5, 10, 15, 20, 25), 'Water Flow': (1000, 3000, 4000, 5000, 8000, 9000),
+        'Sand Content': (0, 5, 6), 'Gas Specific Gravity': (0.7, 0.8, 0.9), 'Oil Flow': (200, 500, 1000, 2000),
+        'Oil API Gravity': (20, 25, 30, 40, 45),
+    }
+    for column, values in thresholds.items():
+        data[column] = rng.choice(values, rows)
+    return data
+
+
+def test_rule_table_matches_reference_chain():
+    data = boundary_cases(5000)
+    results = compute_result_table(data)
+    expected = [reference_separator(row) for _, row in data.iterrows()]
+    assert list(zip(results['Separator Type'], results['Reason'])) == expected
+
+
+def test_first_matching_rule_wins():
+    table = RuleTable({
+        'default': {'type': 'C', 'reason': 'neither'},
+        'rules': [
+            {'name': 'a', 'all': [{'column': 'x', 'op': '>', 'value': 1}], 'type': 'A', 'reason': 'x'},
+            {'name': 'b', 'any': [{'column': 'x', 'op': '>', 'value': 0},
+                                  {'column': 'y', 'op': '==', 'value': 'on'}], 'type': 'B', 'reason': 'x or y'},
+        ],
+    })
+    data = pd.DataFrame({'x': [2, 1, 0, 0], 'y': ['on', 'on', 'on', 'off']})
+    types, reasons = table.select(data)
+    assert types.tolist() == ['A', 'B', 'B', 'C']
+    assert table.hit_counts() == {'a': 1, 'b': 2, 'default': 1}
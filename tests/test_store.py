@@ -0,0 +1,62 @@
+import pytest
+
+from engine import compute_result_table
+from store import ResultsExpired, SQLiteResultStore
+
+
+@pytest.fixture
+def results(cases):
+    return compute_result_table(cases.iloc[:100])
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteResultStore(str(tmp_path / 'results.db'), chunk_rows=30)
+
+
+def test_results_are_stored_in_chunks(store, results):
+    job_id = store.put(results)
+    with store._connect() as db:
+        chunks = db.execute("SELECT chunk, data FROM result_arrays WHERE job_id = ? ORDER BY chunk",
+                            (job_id,)).fetchall()
+    assert [chunk for chunk, _ in chunks] == [0, 1, 2, 3]
+    # npz archives, not pickles
+    assert all(data[:2] == b'PK' for _, data in chunks)
+
+    stored = store.get(job_id)
+    assert len(stored) == 100
+    assert stored.to_table().to_records() == results.to_records()
+    assert [len(batch) for batch in stored.iter_batches()] == [30, 30, 30, 10]
+    assert list(stored.iter_records(batch_rows=7)) == results.to_records()
+
+
+@pytest.mark.parametrize('start, stop', [(0, 30), (25, 35), (29, 91), (90, 100), (95, 200), (50, 50)])
+def test_slices_across_chunk_boundaries(store, results, start, stop):
+    stored = store.get(store.put(results))
+    assert stored[start:stop].to_records() == results[start:stop].to_records()
+
+
+def test_single_rows_and_empty_results(store, results):
+    stored = store.get(store.put(results))
+    assert dict(stored[31]) == dict(results[31])
+    assert dict(stored[-1]) == dict(results[-1])
+    empty = store.get(store.put(results[:0]))
+    assert len(empty) == 0 and len(empty.to_table()) == 0
+
+
+def test_eviction_during_a_read_raises(store, results):
+    job_id = store.put(results)
+    batches = store.get(job_id).iter_batches()
+    next(batches)
+    store.delete(job_id)
+    with pytest.raises(ResultsExpired):
+        list(batches)
+    assert store.get(job_id) is None
+
+
+def test_oldest_jobs_are_evicted(tmp_path, results):
+    store = SQLiteResultStore(str(tmp_path / 'results.db'), max_jobs=2, chunk_rows=30)
+    first, second, third = (store.put(results) for _ in range(3))
+    assert store.get(first) is None
+    assert store.get(second) is not None and store.get(third) is not None
+    assert len(store) == 2
@@ -0,0 +1,60 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+import app
+from cache import UploadCache
+
+
+@pytest.fixture
+def upload(tmp_path, cases):
+    path = tmp_path / 'cases.csv'
+    cases.iloc[:200].to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def upload_cache(tmp_path, monkeypatch):
+    cache = UploadCache(str(tmp_path / 'cache'))
+    monkeypatch.setattr(app, 'upload_cache', cache)
+    return cache
+
+
+def test_key_follows_content_rules_and_version(upload, tmp_path, monkeypatch):
+    key = app.upload_key(upload)
+    renamed = str(tmp_path / 'other name.csv')
+    shutil.copy(upload, renamed)
+    assert app.upload_key(renamed) == key
+
+    with open(renamed, 'a') as f:
+        f.write('\n')
+    assert app.upload_key(renamed) != key
+    assert app.rule_table.fingerprint[:16] in key
+
+    monkeypatch.setattr(app, 'UPLOAD_CACHE_VERSION', app.UPLOAD_CACHE_VERSION + 1)
+    assert app.upload_key(upload) != key
+
+
+def test_process_file_serves_cached_results(upload, upload_cache, monkeypatch):
+    computed = app.process_file(upload)
+    assert upload_cache.stats()['size'] == 1
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached upload was computed again")
+
+    monkeypatch.setattr(app, 'compute_file', fail)
+    assert app.process_file(upload).to_records() == computed.to_records()
+    assert upload_cache.hits == 1
+
+
+def test_entries_are_plain_arrays(upload_cache):
+    upload_cache.set('key', {'values': np.arange(3), 'labels': np.array(['a', 'b'])})
+    entry = upload_cache.get('key')
+    assert entry['values'].tolist() == [0, 1, 2] and entry['labels'].tolist() == ['a', 'b']
+
+    # Object arrays would need pickle to load; such an entry is dropped, not loaded
+    upload_cache.set('objects', {'values': np.array([{'a': 1}], dtype=object)})
+    assert upload_cache.get('objects') is None
+    assert not os.path.exists(upload_cache._path('objects'))
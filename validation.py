@@ -0,0 +1,151 @@
+import numpy as np
+
+# Invalid rows spelled out in an error message before the rest are counted
+MAX_REPORTED_ROWS = 20
+
+ABSOLUTE_ZERO_F = -459.67
+
+# Upload columns: (column, bad(values) -> mask, message); values are floats with NaN for blanks
+UPLOAD_CHECKS = [
+    ('Gas Flow', lambda v: v < 0, "must not be negative"),
+    ('Oil Flow', lambda v: v < 0, "must not be negative"),
+    ('Water Flow', lambda v: v < 0, "must not be negative"),
+    ('Sand Content', lambda v: (v < 0) | (v > 100), "must be between 0 and 100 %"),
+    ('Operating Pressure', lambda v: v <= 0, "must be positive"),
+    ('Operating Temperature', lambda v: v <= ABSOLUTE_ZERO_F, "must be above absolute zero (-459.67 °F)"),
+    ('Oil API Gravity', lambda v: v <= -131.5, "must be above -131.5 °API"),
+    ('Gas Specific Gravity', lambda v: v <= 0, "must be positive"),
+]
+
+# Sizing inputs of sizing.calculate_separator_batch, same layout
+SIZING_CHECKS = [
+    ('Qg', lambda v: v < 0, "must not be negative"),
+    ('Qo', lambda v: v < 0, "must not be negative"),
+    ('Qw', lambda v: v < 0, "must not be negative"),
+    ('Po', lambda v: v <= 0, "must be positive"),
+    ('To', lambda v: v <= ABSOLUTE_ZERO_F, "must be above absolute zero (-459.67 °F)"),
+    ('Sg', lambda v: v <= 0, "must be positive"),
+    ('SG_o', lambda v: v <= -131.5, "must be above -131.5 °API"),
+    ('SG_w', lambda v: v <= 0, "must be positive"),
+    ('Z', lambda v: (v < 0.05) | (v > 3), "must be between 0.05 and 3"),
+    ('mu', lambda v: v <= 0, "must be positive"),
+    ('tr_o', lambda v: v <= 0, "must be positive"),
+    ('tr_w', lambda v: v <= 0, "must be positive"),
+    ('B', lambda v: (v <= 0) | (v > 1), "must be greater than 0 and at most 1"),
+    ('liquid_droplet', lambda v: v <= 0, "must be positive"),
+    ('water_droplet', lambda v: v <= 0, "must be positive"),
+    ('oil_droplet', lambda v: v <= 0, "must be positive"),
+]
+
+
+class ValidationError(ValueError):
+    """
+    Raised with every invalid row of an input, not just the first.
+
+    Attributes:
+        errors (list): {'row', 'column', 'message'} dicts sorted by row. For uploads rows
+            are 1-based positions in the data, not counting the header.
+        label (str): What a row is called in the message, e.g. 'row' or 'case'.
+    """
+
+    def __init__(self, errors, label='row'):
+        self.errors = sorted(errors, key=lambda error: error['row'])
+        self.label = label
+        super().__init__(describe_errors(self.errors, label))
+
+
+def describe_errors(errors, label='row', max_rows=MAX_REPORTED_ROWS):
+    """One-line summary of validation errors, grouped by row."""
+    rows = {}
+    for error in errors:
+        rows.setdefault(error['row'], []).append(error['message'])
+    parts = [f"{label} {row}: {'; '.join(messages)}" for row, messages in list(rows.items())[:max_rows]]
+    if len(rows) > max_rows:
+        parts.append(f"... and {len(rows) - max_rows} more")
+    return f"{len(rows)} invalid {label}{'s' if len(rows) != 1 else ''}: " + " | ".join(parts)
+
+
+def _collect(errors, mask, first_row, column, message):
+    errors.extend({'row': int(row) + first_row, 'column': column, 'message': message}
+                  for row in np.flatnonzero(mask))
+
+
+def _numeric(values, column, first_row, errors):
+    # Floats for a column Series, recording blanks and values that are not numbers
+    import pandas as pd
+
+    converted = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    blank = values.isna().to_numpy()
+    _collect(errors, blank, first_row, column, f"{column} is missing")
+    _collect(errors, np.isnan(converted) & ~blank, first_row, column, f"{column} must be a number")
+    return converted
+
+
+def _check(columns, checks, first_row, errors, labels=None):
+    labels = labels or {}
+    with np.errstate(invalid='ignore'):
+        for column, bad, message in checks:
+            if column in columns:
+                _collect(errors, bad(columns[column]), first_row, column, f"{labels.get(column, column)} {message}")
+
+
+def validate_upload(data, first_row=1):
+    """
+    Checks an upload chunk column by column: numeric types, value ranges and a water cut
+    below 100 %. Required columns are checked separately, from the header.
+
+    Parameters:
+        data (DataFrame): Rows with normalized column names.
+        first_row (int): Row number of the first row in data, for chunked files.
+
+    Returns:
+        list: Error dicts, empty when every row is valid.
+    """
+    errors = []
+    columns = {column: _numeric(data[column], column, first_row, errors)
+               for column, _, _ in UPLOAD_CHECKS if column in data.columns}
+    _check(columns, UPLOAD_CHECKS, first_row, errors)
+
+    if {'Gas Flow', 'Oil Flow', 'Water Flow'} <= columns.keys():
+        gas, oil, water = columns['Gas Flow'], columns['Oil Flow'], columns['Water Flow']
+        total = oil + gas + water
+        with np.errstate(divide='ignore', invalid='ignore'):
+            water_cut = np.where(total != 0, water / total, 0.0)
+        _collect(errors, water_cut >= 1, first_row, 'Water Flow', "Water Cut cannot be 100% or more.")
+    return errors
+
+
+def validate_sizing(inputs, first_row=1, labels=None):
+    """
+    Checks sizing inputs (scalars or per-case arrays named like calculate_separator_batch
+    parameters): ranges per input, an oil lighter than water (dSG > 0) and a liquid
+    denser than the gas at operating conditions.
+
+    Parameters:
+        inputs (dict): Values per parameter name; inputs that are not given are not checked.
+        first_row (int): Number of the first case in the error dicts.
+        labels (dict): Names to show in messages instead of the parameter names.
+
+    Returns:
+        list: Error dicts, empty when every case is valid.
+    """
+    labels = labels or {}
+    errors = []
+    arrays = {name: np.atleast_1d(np.asarray(value, dtype=float)) for name, value in inputs.items()}
+    shape = np.broadcast_shapes(*(array.shape for array in arrays.values()))
+    columns = {name: np.broadcast_to(array, shape).ravel() for name, array in arrays.items()}
+    for name, values in columns.items():
+        _collect(errors, np.isnan(values), first_row, name, f"{labels.get(name, name)} must be a number")
+    _check(columns, SIZING_CHECKS, first_row, errors, labels)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if {'SG_o', 'SG_w'} <= columns.keys():
+            oil_sg = 141.5 / (131.5 + columns['SG_o'])
+            _collect(errors, columns['SG_w'] - oil_sg <= 0, first_row, 'SG_w',
+                     "Water must be denser than the oil (SG_w above the oil specific gravity)")
+            if {'Po', 'To', 'Sg', 'Z'} <= columns.keys():
+                liquid_density = 62.4 * oil_sg
+                gas_density = (2.7 * columns['Sg'] * columns['Po']) / ((columns['To'] - ABSOLUTE_ZERO_F) * columns['Z'])
+                _collect(errors, liquid_density - gas_density <= 0, first_row, 'Po',
+                         "Liquid must be denser than the gas at operating conditions")
+    return errors